@@ -1,61 +1,149 @@
-from collections import UserDict
+from itertools import islice
 from Record import Record
+from Storage import JournalStorage, SharedJournalStorage
+from contextlib import contextmanager
+from Index import SubstringIndex, BirthdayIndex, NgramIndex
+import heapq
+from Codecs import codecs
+from datetime import date
 import pickle
 import re
-from decorators import input_error
+from decorators import input_error, notify, profiler
+from BookBase import BookBase, REGEX_CHARS
 
 
-class AddressBook(UserDict):
+class AddressBook(BookBase):
+    storage = None  # JournalStorage, якщо книга відкрита через from_journal
+
+    def __init__(self, *args, **kwargs):
+        self.names_index = SubstringIndex()  # підрядки імен у нижньому регістрі
+        self.phones_index = SubstringIndex()  # підрядки номерів телефонів
+        self.birthdays_index = BirthdayIndex()  # дні народження за днем року
+        self.names_ngrams = NgramIndex()  # триграми імен для нечіткого пошуку
+        self.phones_ngrams = NgramIndex(pad=False, containment=True)  # триграми номерів
+        self.indexed = False  # індекси будуються при першому пошуку, а не при завантаженні
+        super().__init__(*args, **kwargs)
+
+    # будує індекси, якщо їх ще немає
+    def ensure_index(self):
+        if not self.indexed:
+            self.build_index()
+
+    # перебудовує індекси після масового завантаження даних
+    def build_index(self):
+        self.names_index.build((name, name.lower(), name) for name in self.data)
+        self.names_ngrams.build((name, name.lower(), name) for name in self.data)
+        self.phones_index.build(
+            (phone.get_value, phone.get_value, name)
+            for name, record in self.data.items() for phone in record.phones
+        )
+        self.phones_ngrams.build(
+            (phone.get_value, phone.get_value, name)
+            for name, record in self.data.items() for phone in record.phones
+        )
+        self.birthdays_index.build(
+            (name, date.fromordinal(record.birthday_ordinal))
+            for name, record in self.data.items() if record.birthday_ordinal
+        )
+        for record in self.data.values():
+            record.book = self
+        self.indexed = True
+
+    def index_record(self, record: Record):
+        if not self.indexed:
+            return
+        name = record.name.get_value
+        self.names_index.add(name, name.lower(), name)
+        self.names_ngrams.add(name, name.lower(), name)
+        for phone in record.phones:
+            self.phones_index.add(phone.get_value, phone.get_value, name)
+            self.phones_ngrams.add(phone.get_value, phone.get_value, name)
+        if record.birthday_ordinal:
+            self.birthdays_index.add(name, date.fromordinal(record.birthday_ordinal))
+        record.book = self
+
+    def unindex_record(self, record: Record):
+        record.book = None
+        if not self.indexed:
+            return
+        name = record.name.get_value
+        self.names_index.remove(name, name.lower(), name)
+        self.names_ngrams.remove(name, name.lower(), name)
+        for phone in record.phones:
+            self.phones_index.remove(phone.get_value, phone.get_value, name)
+            self.phones_ngrams.remove(phone.get_value, phone.get_value, name)
+        if record.birthday_ordinal:
+            self.birthdays_index.remove(name, date.fromordinal(record.birthday_ordinal))
+
+    # викликається записом при додаванні, зміні чи видаленні телефону
+    def update_phone_index(self, name, old_phone=None, new_phone=None):
+        if not self.indexed:
+            return
+        if old_phone is not None:
+            self.phones_index.remove(old_phone, old_phone, name)
+            self.phones_ngrams.remove(old_phone, old_phone, name)
+        if new_phone is not None:
+            self.phones_index.add(new_phone, new_phone, name)
+            self.phones_ngrams.add(new_phone, new_phone, name)
+
+    # викликається записом при зміні дня народження (0 - не було / немає)
+    def update_birthday_index(self, name, old_ordinal=0, new_ordinal=0):
+        if not self.indexed:
+            return
+        if old_ordinal:
+            self.birthdays_index.remove(name, date.fromordinal(old_ordinal))
+        if new_ordinal:
+            self.birthdays_index.add(name, date.fromordinal(new_ordinal))
 
     # додає запис до адресної книги
     @input_error
     def add_record(self, record: Record):
+        old_record = self.data.get(record.name.get_value)
+        if old_record is not record:
+            if old_record is not None:
+                self.unindex_record(old_record)
+            self.index_record(record)
         self.data[record.name.get_value] = record
-        print(f"Сontact {record.name.get_value} has been added to the records")
+        self.journal('put', record.name.get_value, record)
+        notify(f"Сontact {record.name.get_value} has been added to the records")
 
-    # знаходить за ім'ям.
+    # додає пакет записів без виводу по кожному контакту;
+    # великий пакет скидає індекси - дешевше перебудувати їх одним сортуванням при пошуку
     @input_error
-    def find(self, name):
-        if name in self.data.keys():
-            return self.data[name]
-        else:
-            print(f"{name} not found")
+    def add_records(self, records: list):
+        if self.indexed and len(records) * 100 > len(self.data):
+            self.indexed = False
+        for record in records:
+            old_record = self.data.get(record.name.get_value)
+            if old_record is not record:
+                if old_record is not None:
+                    self.unindex_record(old_record)
+                self.index_record(record)
+            self.data[record.name.get_value] = record
+        self.journal_batch([('put', record.name.get_value, record) for record in records])
 
     # видаляє запис за ім'ям.
     @input_error
     def delete(self, name):
         if name in self.data.keys():
-            del self.data[name]
-            print(f"{name} is delete")
+            self.unindex_record(self.data.pop(name))
+            self.journal('delete', name)
+            notify(f"{name} is delete")
         else:
-            print(f"{name} not found")
+            notify(f"{name} not found")
 
-    # повертає генератор за записами;
-    # якщо кількість контактів запиту більша за кількість контактів в словнику -> всі контакти;
+    # повертає сторінку number (з нуля) по quantity записів
     @input_error
-    def iterator(self, quantity):
-        counter = 0
-        result = ''
-        if len(self.data) < quantity:
-            for record in self.data.values():
-                result += f'\n{record}'
-            yield result
-        else:
-            for record in self.data.values():
-                result += f'\n{record}'
-                counter += 1
-                if counter >= quantity:
-                    yield result
-                    counter = 0
-                    result = ''
-            if counter > 0:
-                yield result
+    def page(self, number, quantity, records=None):
+        records = self.data if records is None else records
+        return list(islice(records.values(), number * quantity, (number + 1) * quantity))
 
     # серіалізація даних адресної книги
     @input_error
     def to_pickle(self, file_name="backup_address_book"):
         with open(f'{file_name}.pkl', 'wb') as file:
             pickle.dump(self.data, file)
+            profiler.record_io(written=file.tell())
         print(f"Address book saved to {file_name}.pkl")
 
     # десеріалізація даних адресної книги
@@ -64,20 +152,158 @@ class AddressBook(UserDict):
         try:
             with open(f"{filename}.pkl", 'rb') as file:
                 data = pickle.load(file)
+                profiler.record_io(read=file.tell())
                 self.data.update(data)
+                self.indexed = False
             print(f"Address book loaded from {filename}")
 
         except FileNotFoundError:
             print(f"File {filename} not found. Creating a new address book.")
 
+    # відкриває книгу з журналу змін: знімок .pkl + програвання .wal;
+    # shared=True - книгою одночасно користуються кілька процесів;
+    # книгу, яку не вдалося прочитати, не відкриває - піднімає SnapshotError
+    def from_journal(self, file_name="backup_address_book", flush_every=1, flush_idle=None, codec='pickle', shared=False):
+        storage_class = SharedJournalStorage if shared else JournalStorage
+        self.storage = storage_class(file_name, flush_every=flush_every, flush_idle=flush_idle, codec=codec)
+        if shared:
+            self.storage.apply = self.apply_change
+            self.storage.reload = self.replace_data
+        self.data.update(self.storage.load())
+        self.indexed = False
+
+    def shared(self):
+        return isinstance(self.storage, SharedJournalStorage)
+
+    # блокує спільну книгу для читання-зміни-запису і дочитує чужі зміни;
+    # для звичайної книги нічого не робить
+    @contextmanager
+    def locked(self):
+        if not self.shared():
+            yield
+            return
+        with self.storage.locked():
+            self.storage.catch_up()
+            yield
+
+    # підхоплює зміни, зроблені іншими процесами
+    @input_error
+    def refresh(self):
+        if self.shared():
+            self.storage.refresh()
+
+    # застосовує зміну з журналу іншого процесу без запису в журнал
+    def apply_change(self, operation, name, record=None):
+        old_record = self.data.pop(name, None)
+        if old_record is not None:
+            self.unindex_record(old_record)
+        if operation == 'put':
+            self.data[name] = record
+            self.index_record(record)
+
+    # замінює всі дані, коли чужі зміни не можна дочитати з хвоста журналу
+    def replace_data(self, data):
+        for record in self.data.values():
+            record.book = None
+        self.data.clear()
+        self.data.update(data)
+        self.indexed = False
+
+    # чи є зміни, ще не скинуті на диск
+    @property
+    def dirty(self):
+        return self.storage is not None and self.storage.pending > 0
+
+    # скидає накопичені зміни на диск
+    @input_error
+    def save(self):
+        if self.dirty:
+            self.storage.flush()
+            print("Address book saved")
+
+    # зберігає зміни і закриває журнал
+    @input_error
+    def close(self):
+        if self.storage is not None:
+            self.storage.close()
+
+    # записує зміну в журнал, при потребі ущільнює його у фоні
+    def journal(self, operation, name, record=None):
+        if self.storage is None:
+            return
+        self.storage.append(operation, name, record)
+        if self.storage.need_compact():
+            self.storage.compact(self.data)
+
+    # записує пакет змін у журнал одним fsync
+    def journal_batch(self, changes):
+        if self.storage is None:
+            return
+        self.storage.append_batch(changes, sync=True)
+        if self.storage.need_compact():
+            self.storage.compact(self.data)
+
+    # записи з днем народження між датами first і last включно, у порядку настання
+    @input_error
+    def birthdays_between(self, first: date, last: date):
+        self.ensure_index()
+        return {name: self.data[name] for name in self.birthdays_index.between(first, last)}
+
+    # зберігає книгу у файл у форматі codec ('pickle', 'binary', 'jsonl')
+    @input_error
+    def to_file(self, file_name="backup_address_book", codec='pickle'):
+        codec = codecs[codec]
+        with open(f'{file_name}{codec.extension}', 'wb') as file:
+            codec.dump(self.data, file)
+            profiler.record_io(written=file.tell())
+        print(f"Address book saved to {file_name}{codec.extension}")
+
+    # завантажує книгу з файлу у форматі codec, записи читаються потоково
+    @input_error
+    def from_file(self, file_name="backup_address_book", codec='pickle'):
+        codec = codecs[codec]
+        try:
+            with open(f'{file_name}{codec.extension}', 'rb') as file:
+                for record in codec.load(file):
+                    self.data[record.name.get_value] = record
+                profiler.record_io(read=file.tell())
+            self.indexed = False
+            print(f"Address book loaded from {file_name}{codec.extension}")
+        except FileNotFoundError:
+            print(f"File {file_name}{codec.extension} not found. Creating a new address book.")
+
+    # нечіткий пошук за триграмами імені та номера, стійкий до помилок;
+    # повертає до limit пар (запис, оцінка) від найкращої
+    @input_error
+    def fuzzy_find(self, query: str, limit=10):
+        self.ensure_index()
+        query = query.strip().lower()
+        scores = self.names_ngrams.find(query)
+        digits = ''.join(char for char in query if char.isdigit())
+        if len(digits) >= self.phones_ngrams.size:
+            for name, score in self.phones_ngrams.find(digits).items():
+                scores[name] = max(score, scores.get(name, 0))
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(self.data[name], score) for name, score in best]
+
     # пошук одного або кількох користувачів
-    # за кількома цифрами номера телефону або літерами імені
+    # за кількома цифрами номера телефону або літерами імені;
+    # звичайний рядок шукається через індекси, регулярний вираз - перебором імен
     @input_error
     def find_to_show(self, find_str: str):
         find_dict = {}
-        for name, contact in self.data.items():
-            if re.search(find_str, str(name.lower())):
-                find_dict[name] = contact
+        if not REGEX_CHARS & set(find_str):
+            self.ensure_index()
+            query = find_str.lower()
+            names = self.names_index.find(query)
+            if query.isdigit():
+                names |= self.phones_index.find(query)
+            for name in sorted(names):
+                find_dict[name] = self.data[name]
+        else:
+            for name, contact in self.data.items():
+                if re.search(find_str, str(name.lower())):
+                    find_dict[name] = contact
         if len(find_dict) > 0:
             return find_dict
         else:
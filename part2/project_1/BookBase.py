@@ -0,0 +1,45 @@
+from collections import UserDict
+from datetime import date, timedelta
+from itertools import islice
+import calendar
+from decorators import input_error, notify
+
+
+REGEX_CHARS = set('.^$*+?{}[]\\|()')  # запит з цими символами - регулярний вираз
+
+
+# спільна частина AddressBook і SqliteAddressBook, що не залежить від сховища;
+# нащадок визначає birthdays_between(first, last)
+class BookBase(UserDict):
+
+    # знаходить за ім'ям.
+    @input_error
+    def find(self, name):
+        if name in self.data:
+            return self.data[name]
+        else:
+            notify(f"{name} not found")
+
+    # повертає генератор сторінок - списків до quantity записів;
+    # записи не копіюються, в пам'яті одночасно лише одна сторінка
+    @input_error
+    def iterator(self, quantity, records=None):
+        records = iter((self.data if records is None else records).values())
+        while True:
+            page = list(islice(records, quantity))
+            if not page:
+                return
+            yield page
+
+    # іменинники на найближчі days днів, починаючи з сьогодні
+    @input_error
+    def upcoming_birthdays(self, days: int):
+        today = date.today()
+        return self.birthdays_between(today, today + timedelta(days=days - 1))
+
+    # іменинники поточного місяця
+    @input_error
+    def month_birthdays(self):
+        today = date.today()
+        last_day = calendar.monthrange(today.year, today.month)[1]
+        return self.birthdays_between(today.replace(day=1), today.replace(day=last_day))
@@ -0,0 +1,106 @@
+import json
+import pickle
+import struct
+from abc import ABC, abstractmethod
+from datetime import date
+from Record import Record
+
+
+class Codec(ABC):
+    extension = ''
+
+    # записує словник {ім'я: Record} у відкритий бінарний файл
+    @abstractmethod
+    def dump(self, data: dict, file):
+        pass
+
+    # читає записи з відкритого бінарного файлу, повертає генератор Record
+    @abstractmethod
+    def load(self, file):
+        pass
+
+    @staticmethod
+    def make_record(name, numbers, birthday_ordinal):
+        record = Record(name)
+        record.numbers.extend(numbers)
+        record.birthday_ordinal = birthday_ordinal
+        return record
+
+
+# весь словник одним pickle - сумісний з попередніми backup_address_book.pkl
+class PickleCodec(Codec):
+    extension = '.pkl'
+
+    def dump(self, data, file):
+        pickle.dump(data, file, pickle.HIGHEST_PROTOCOL)
+
+    def load(self, file):
+        yield from pickle.load(file).values()
+
+
+# компактний бінарний формат: на запис - довжина імені u32, ім'я utf-8,
+# кількість телефонів u32, телефони як u64, день народження як порядковий номер дня u32
+class BinaryCodec(Codec):
+    extension = '.abk'
+    MAGIC = b'ABK2'
+    HEAD = struct.Struct('<II')
+    # ABK1 мав u16 довжину імені і u8 кількість телефонів; такі файли ще читаються
+    HEADS = {b'ABK1': struct.Struct('<HB'), MAGIC: HEAD}
+    BIRTHDAY = struct.Struct('<I')
+
+    def dump(self, data, file):
+        file.write(self.MAGIC)
+        for record in data.values():
+            name = record.name.get_value.encode('utf-8')
+            file.write(self.HEAD.pack(len(name), len(record.numbers)))
+            file.write(name)
+            file.write(struct.pack(f'<{len(record.numbers)}Q', *record.numbers))
+            file.write(self.BIRTHDAY.pack(record.birthday_ordinal))
+
+    def load(self, file):
+        head_format = self.HEADS.get(file.read(len(self.MAGIC)))
+        if head_format is None:
+            raise ValueError("Not an address book binary file")
+        while True:
+            head = file.read(head_format.size)
+            if not head:
+                return
+            name_size, phones_count = head_format.unpack(head)
+            name = file.read(name_size).decode('utf-8')
+            numbers = struct.unpack(f'<{phones_count}Q', file.read(8 * phones_count))
+            birthday_ordinal, = self.BIRTHDAY.unpack(file.read(self.BIRTHDAY.size))
+            yield self.make_record(name, numbers, birthday_ordinal)
+
+
+# JSON по рядку на запис, читається потоково без завантаження всього файлу
+class JsonLinesCodec(Codec):
+    extension = '.jsonl'
+
+    def dump(self, data, file):
+        for record in data.values():
+            line = {
+                'name': record.name.get_value,
+                'phones': [phone.get_value for phone in record.phones],
+                'birthday': record.birthdays.get_value.isoformat() if record.birthday_ordinal else None,
+            }
+            file.write(json.dumps(line, ensure_ascii=False).encode('utf-8'))
+            file.write(b'\n')
+
+    def load(self, file):
+        for line in file:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            birthday = item.get('birthday')
+            yield self.make_record(
+                item['name'],
+                (int(phone) for phone in item.get('phones', [])),
+                date.fromisoformat(birthday).toordinal() if birthday else 0,
+            )
+
+
+codecs = {
+    'pickle': PickleCodec(),
+    'binary': BinaryCodec(),
+    'jsonl': JsonLinesCodec(),
+}
@@ -1,13 +1,20 @@
 from AddressBook import AddressBook
-from Table import BookTable, HelpTable
+from Table import BookTable, HelpTable, SearchTable, StatsTable
 from Record import Record
+from Transfer import import_contacts, export_contacts
 from abc import ABC, abstractmethod, ABCMeta
-from rich.console import Console
-from decorators import input_error
+from decorators import input_error, profiler
 
 
-handlers_dict = {}  # Глобальний словник для HandlerFactory
+handlers_dict = {}  # Глобальний словник для HandlerFactory: команда -> клас обробника
 help_dict = {}  # Глобальний словник для таблиці HelpTable
+PAGE_SIZE = 20  # Кількість записів на одній сторінці таблиці
+
+
+# rich імпортується лише коли потрібно щось вивести таблицею
+def console_factory():
+    from rich.console import Console
+    return Console()
 
 
 class HandlerMeta(ABCMeta):
@@ -15,17 +22,38 @@ class HandlerMeta(ABCMeta):
     def __new__(mcs, name, bases, nameplace):
         cls = super().__new__(mcs, name, bases, nameplace)
         if cls.__name__ != 'Handler':
-            handlers_dict[name.lower()] = cls()
+            handlers_dict[name.lower()] = cls  # екземпляр створює HandlerFactory при першому виклику
             help_dict[name.lower()] = cls.__doc__
         return cls
 
 
 class Handler(ABC, metaclass=HandlerMeta):
+    book: AddressBook = None  # книга сесії, яку передає HandlerFactory
 
     @abstractmethod
     def handler(self):
         pass
 
+    # виводить записи таблицями по PAGE_SIZE з навігацією next/prev
+    def show_pages(self, records: dict):
+        console = console_factory()
+        pages = max(1, -(-len(records) // PAGE_SIZE))
+        number = 0
+        while True:
+            show = BookTable(self.book.page(number, PAGE_SIZE, records), f"Page {number + 1}/{pages}")
+            console.print(show.get_table())
+            if pages == 1:
+                return
+            command = input("[n]ext, [p]rev, [q]uit>>> ").strip().lower()
+            if command in ('', 'n', 'next'):
+                if number == pages - 1:
+                    return
+                number += 1
+            elif command in ('p', 'prev'):
+                number = max(number - 1, 0)
+            else:
+                return
+
 
 class Hello(Handler):
     """Say hello!"""
@@ -38,6 +66,7 @@ class Exit(Handler):
     """Exit from assistant"""
 
     def handler(self):
+        self.book.save()
         return print("Good bye!")
 
 
@@ -45,97 +74,133 @@ class Show(Handler):
     """Show all contacts"""
     @input_error
     def handler(self):
-        book = AddressBook()
-        book.from_pickle()
-        console = Console()
-        show = BookTable(book.data)
-        console.print(show.get_table())
+        self.show_pages(self.book.data)
 
 
 class Create(Handler):
     """Create a new contacts record"""
     @input_error
     def handler(self):
-        book = AddressBook()
-        book.from_pickle()
         name = input("Input name>>> ")
         temp_obj = Record(name.lower())
 
         phone = input("Input phone>>> ")
         temp_obj.add_phone(phone)
 
-        book.add_record(temp_obj)
+        self.book.add_record(temp_obj)
         temp_obj = None
 
-        book.to_pickle()
-
 
 class Find(Handler):
     """Find contacts record by name"""
     @input_error
     def handler(self):
-        book = AddressBook()
-        book.from_pickle()
         request = input("Input request>>> ")
-        console = Console()
-        show = BookTable(book.find_to_show(request))
-        console.print(show.get_table())
+        self.show_pages(self.book.find_to_show(request))
+
+
+class Search(Handler):
+    """Fuzzy search by name or phone, best matches first"""
+    @input_error
+    def handler(self):
+        request = input("Input request>>> ")
+        results = self.book.fuzzy_find(request)
+        if not results:
+            return print(f"{request} not found")
+        console = console_factory()
+        console.print(SearchTable(results).get_table())
 
 
 class AddPhone(Handler):
     """Add phone to the record"""
     @input_error
     def handler(self):
-        book = AddressBook()
-        book.from_pickle()
-
         name = input("Сontact name to add phone?>>> ")
         name.lower()
-        obj_rec = book.find(name.capitalize())
+        obj_rec = self.book.find(name.capitalize())
 
         phone = input("Input phone>>> ")
-        obj_rec.add_phone(phone)
-        book.add_record(obj_rec)
+        with self.book.locked():
+            # у спільній книзі інший процес міг змінити запис, поки вводився номер
+            obj_rec = self.book.find(name.capitalize())
+            obj_rec.add_phone(phone)
+            self.book.add_record(obj_rec)
         obj_rec = None
-        book.to_pickle()
 
 
 class AddBirthday(Handler):
     """Add contacts birthday to the record"""
     @input_error
     def handler(self):
-        book = AddressBook()
-        book.from_pickle()
-
         name = input("Сontact name to add birthday?>>> ")
         name.lower()
-        obj_rec = book.find(name.capitalize())
+        obj_rec = self.book.find(name.capitalize())
 
         date = input("Input birthday (Year.Month.Day)>>> ")
-        obj_rec.add_birthday(date)
-        book.add_record(obj_rec)
+        with self.book.locked():
+            obj_rec = self.book.find(name.capitalize())
+            obj_rec.add_birthday(date)
+            self.book.add_record(obj_rec)
         obj_rec = None
-        book.to_pickle()
 
 
 class DeleteContact(Handler):
     """Remove contacts record"""
     @input_error
     def handler(self):
-        book = AddressBook()
-        book.from_pickle()
-
         name = input("Сontact name to delete?>>> ")
         name.lower()
-        book.delete(name.capitalize())
-        book.to_pickle()
+        self.book.delete(name.capitalize())
+
+
+class Birthdays(Handler):
+    """Show contacts with birthdays in the next N days or this month"""
+    @input_error
+    def handler(self):
+        request = input("Days ahead or 'month'>>> ").strip().lower()
+        if request == 'month':
+            records = self.book.month_birthdays()
+        else:
+            records = self.book.upcoming_birthdays(int(request))
+        self.show_pages(records)
+
+
+class Import(Handler):
+    """Import contacts from a .csv or .vcf file"""
+    @input_error
+    def handler(self):
+        path = input("File to import>>> ").strip()
+        print(import_contacts(self.book, path))
+
+
+class Export(Handler):
+    """Export contacts to a .csv or .vcf file"""
+    @input_error
+    def handler(self):
+        path = input("File to export>>> ").strip()
+        count = export_contacts(self.book, path)
+        print(f"{count} contacts exported to {path}")
+
+
+class Stats(Handler):
+    """Show call counts, timings and disk I/O of this session"""
+
+    def handler(self):
+        if not profiler.enabled:
+            profiler.enabled = True
+            return print("Profiling enabled, run commands and call stats again")
+        stats = [stats for stats in profiler.stats.values() if stats.calls]
+        if not stats:
+            return print("Nothing profiled yet")
+        console = console_factory()
+        console.print(StatsTable(stats).get_table())
 
 
 class Help(Handler):
     """Call command description"""
 
     def handler(self):
-        console = Console()
+        console = console_factory()
         show = HelpTable(help_dict)
         console.print(show.get_table())
 
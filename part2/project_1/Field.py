@@ -1,15 +1,53 @@
-from datetime import datetime
+from datetime import datetime, date
+from array import array
+from itertools import compress
+from operator import not_
+import calendar
+import re
 from abc import ABC, abstractmethod
+from decorators import notify, quiet
 
 
+# помилка валідації поля; field - назва поля для звіту пакетного імпорту
+class FieldError(ValueError):
+
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+
+
+# поля зберігаються в __slots__ без __dict__, щоб мільйони контактів займали менше пам'яті
 class Field(ABC):
+    __slots__ = ()
 
     @abstractmethod
     def __str__(self):
         pass
 
+    # стан з pickle-файлів до __slots__ - словник {'_Клас__поле': значення}
+    @staticmethod
+    def legacy_state(state):
+        return next(iter(state.values()))
+
+    # пакетна перевірка стовпця значень для масового імпорту: повертає (валідні значення,
+    # маска відхилених - bytes, де 1 означає невалідне значення на цій позиції);
+    # тут - перевірка по одному через конструктор, підкласи роблять це швидше
+    @classmethod
+    def validate_many(cls, values):
+        valid = []
+        rejected = bytearray(len(values))
+        with quiet():
+            for position, value in enumerate(values):
+                try:
+                    valid.append(cls(value).get_value)
+                except ValueError:
+                    rejected[position] = 1
+        return valid, bytes(rejected)
+
 
 class Name(Field):
+    __slots__ = ('__name',)
+
     def __init__(self, name):
         self.__name = None
         self.set_value = name
@@ -23,50 +61,138 @@ class Name(Field):
         if len(value) > 0:
             self.__name = value.capitalize()
         else:
-            print(f"Name {value} isn't correct.")
-            raise ValueError
+            notify(f"Name {value} isn't correct.")
+            raise FieldError('name', f"Name {value} isn't correct")
+
+    def __reduce__(self):
+        return Name, (self.__name,)
+
+    def __setstate__(self, state):
+        self.__name = self.legacy_state(state)
 
     def __str__(self):
         return f"{self.get_value}"
 
 
+# номер зберігається як ціле число, рядок з 10 цифр відновлюється при читанні
 class Phone(Field):
+    __slots__ = ('__phone',)
+
     def __init__(self, phone):
         self.__phone = None
         self.set_value = phone
 
+    # телефон з уже перевіреного числа, без повторної валідації
+    @classmethod
+    def from_number(cls, number: int):
+        phone = cls.__new__(cls)
+        phone.__phone = number
+        return phone
+
     @property
-    def get_value(self):
+    def number(self):
         return self.__phone
 
+    @property
+    def get_value(self):
+        return f"{self.__phone:010d}"
+
     @get_value.setter
     def set_value(self, value: str):
-        if len(value) == 10 and value.isdigit():
-            self.__phone = value
+        # isdigit приймає й не-ASCII цифри ('²'), які int не розбирає
+        if len(value) == 10 and value.isascii() and value.isdigit():
+            self.__phone = int(value)
         else:
-            print((f"Phone {value} isn't valid"))
-            raise ValueError
+            notify(f"Phone {value} isn't valid")
+            raise FieldError('phone', f"Phone {value} isn't valid")
+
+    # валідні номери як array('Q') чисел; та сама перевірка, що й у set_value,
+    # але ланцюжком map по всьому стовпцю без циклу Python
+    @classmethod
+    def validate_many(cls, values):
+        valid = list(map(all, zip(
+            map((10).__eq__, map(len, values)), map(str.isascii, values), map(str.isdigit, values)
+        )))
+        return array('Q', map(int, compress(values, valid))), bytes(map(not_, valid))
+
+    def __reduce__(self):
+        return Phone.from_number, (self.__phone,)
+
+    def __setstate__(self, state):
+        self.__phone = int(self.legacy_state(state))
 
     def __str__(self):
         return f"{self.get_value}"
 
 
+# дата зберігається як порядковий номер дня (date.toordinal)
 class Birthday(Field):
+    __slots__ = ('__birthday',)
+    PATTERN = re.compile(r'(\d{4})\.(\d{1,2})\.(\d{1,2})', re.ASCII)
+
     def __init__(self, birthday):
         self.__birthday = None
         self.set_value = birthday
 
+    @classmethod
+    def from_ordinal(cls, ordinal: int):
+        birthday = cls.__new__(cls)
+        birthday.__birthday = ordinal
+        return birthday
+
     @property
-    def get_value(self):
+    def ordinal(self):
         return self.__birthday
 
+    @property
+    def get_value(self):
+        return date.fromordinal(self.__birthday)
+
+    # дата дня народження в заданому році; 29 лютого в невисокосний рік - 28 лютого
+    def in_year(self, year: int):
+        birthday = self.get_value
+        if birthday.month == 2 and birthday.day == 29 and not calendar.isleap(year):
+            return date(year, 2, 28)
+        return birthday.replace(year=year)
+
+    # найближчий день народження, не раніше за today
+    def next_after(self, today: date):
+        birthday = self.in_year(today.year)
+        if birthday < today:
+            birthday = self.in_year(today.year + 1)
+        return birthday
+
     @get_value.setter
     def set_value(self, value: str):
         if len(value.split('.')) == 3 and all(part.isdigit() for part in value.split('.')) and len(value.split('.')[0]) == 4:
-            self.__birthday = datetime.strptime(value, '%Y.%m.%d').date()
+            try:
+                self.__birthday = datetime.strptime(value, '%Y.%m.%d').toordinal()
+            except ValueError as error:
+                raise FieldError('birthday', str(error)) from error
         else:
-            print("Date format isn't valid, should be: year.month.day")
-            raise ValueError
+            notify("Date format isn't valid, should be: year.month.day")
+            raise FieldError('birthday', f"Date {value} isn't valid, should be: year.month.day")
+
+    # валідні дати як array('L') порядкових номерів днів; кожна різна дата розбирається
+    # один раз - у стовпці з мільйонів рядків дат лише десятки тисяч
+    @classmethod
+    def validate_many(cls, values):
+        ordinals = {}
+        for value in set(values):
+            match = cls.PATTERN.fullmatch(value)
+            if match:
+                try:
+                    ordinals[value] = date(*map(int, match.groups())).toordinal()
+                except ValueError:
+                    pass
+        known = list(map(ordinals.__contains__, values))
+        return array('L', map(ordinals.__getitem__, compress(values, known))), bytes(map(not_, known))
+
+    def __reduce__(self):
+        return Birthday.from_ordinal, (self.__birthday,)
+
+    def __setstate__(self, state):
+        self.__birthday = self.legacy_state(state).toordinal()
 
     def __str__(self):
         return f"{self.get_value}"
@@ -0,0 +1,214 @@
+from array import array
+from bisect import bisect_left, insort
+from datetime import date
+import calendar
+
+
+# індекс підрядків: для кожної триграми - array('I') номерів ключів, що її містять;
+# кандидати на підрядок беруться з найрідкіснішої триграми запиту і перевіряються через in,
+# запити коротші за триграму перевіряють усі ключі
+class SubstringIndex:
+    SIZE = 3
+
+    def __init__(self):
+        self.build(())
+
+    @classmethod
+    def grams(cls, text):
+        return {text[i:i + cls.SIZE] for i in range(len(text) - cls.SIZE + 1)}
+
+    def build(self, pairs):
+        self.ids = {}  # ключ -> номер
+        self.keys = []  # номер -> ключ
+        self.texts = []  # номер -> текст ключа, None для видаленого
+        self.postings = {}  # триграма -> array('I') номерів ключів у порядку додавання
+        self.owners = {}  # ключ -> множина імен контактів, яким він належить
+        for key, text, owner in pairs:
+            self.add(key, text, owner)
+
+    def add(self, key, text, owner):
+        if key not in self.owners:
+            self.owners[key] = set()
+            key_id = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.texts.append(text)
+            for gram in self.grams(text):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('I')
+                posting.append(key_id)
+        self.owners[key].add(owner)
+
+    # видалений ключ лише позначається None, номери з постінгів прибирає compact,
+    # коли видалених стає більше, ніж живих
+    def remove(self, key, text, owner):
+        owners = self.owners.get(key)
+        if owners is None:
+            return
+        owners.discard(owner)
+        if owners:
+            return
+        del self.owners[key]
+        self.texts[self.ids.pop(key)] = None
+        if len(self.keys) > 2 * len(self.ids):
+            self.compact()
+
+    def compact(self):
+        owners = self.owners
+        pairs = [(self.keys[key_id], self.texts[key_id]) for key_id in sorted(self.ids.values())]
+        self.build(())
+        for key, text in pairs:
+            self.add(key, text, None)
+            self.owners[key] = owners[key]
+
+    # повертає імена контактів, у яких є ключ з підрядком query
+    def find(self, query):
+        if len(query) < self.SIZE:
+            candidates = range(len(self.texts))
+        else:
+            postings = [self.postings.get(gram) for gram in self.grams(query)]
+            if not all(postings):
+                return set()
+            candidates = min(postings, key=len)
+        result = set()
+        for key_id in candidates:
+            text = self.texts[key_id]
+            if text is not None and query in text:
+                result.update(self.owners[self.keys[key_id]])
+        return result
+
+
+# індекс днів народження: відсортований масив (день року, ім'я);
+# день року рахується за високосним 2000 роком, тож 29 лютого має власний ключ 60
+class BirthdayIndex:
+
+    def __init__(self):
+        self.entries = []
+
+    @staticmethod
+    def day_key(day: date):
+        return date(2000, day.month, day.day).timetuple().tm_yday
+
+    def build(self, pairs):
+        self.entries = sorted((self.day_key(birthday), name) for name, birthday in pairs)
+
+    def add(self, name, birthday: date):
+        insort(self.entries, (self.day_key(birthday), name))
+
+    def remove(self, name, birthday: date):
+        entry = (self.day_key(birthday), name)
+        position = bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    # імена з ключами first..last включно
+    def key_range(self, first, last):
+        return [name for _, name in self.entries[bisect_left(self.entries, (first,)):bisect_left(self.entries, (last + 1,))]]
+
+    # діапазони ключів (початок, кінець) для дат між first і last включно, у порядку настання
+    @classmethod
+    def segments(cls, first: date, last: date):
+        start = cls.day_key(first)
+        if (last - first).days >= 365:
+            return [(start, 366), (1, start - 1)]
+        if first.year == last.year:
+            segments = [(first.year, start, cls.day_key(last))]
+        else:
+            segments = [(first.year, start, 366), (last.year, 1, cls.day_key(last))]
+        result = []
+        for year, start, end in segments:
+            # у невисокосний рік іменинники 29 лютого святкують 28 лютого
+            if end == 59 and not calendar.isleap(year):
+                end = 60
+            result.append((start, end))
+        return result
+
+    # імена з днем народження між датами first і last включно, у порядку настання
+    def between(self, first: date, last: date):
+        result = []
+        for start, end in self.segments(first, last):
+            result.extend(self.key_range(start, end))
+        return result
+
+
+# найменша оцінка нечіткого збігу, спільна для AddressBook і SqliteAddressBook
+FUZZY_CUTOFF = 0.2
+
+
+# індекс n-грам для нечіткого пошуку з урахуванням помилок:
+# кандидати - ключі, що мають хоча б needed n-грам запиту (одна помилка псує не більше size n-грам),
+# оцінка - коефіцієнт Дайса або (containment=True) частка n-грам запиту, знайдених у ключі
+class NgramIndex:
+
+    def __init__(self, size=3, pad=True, containment=False):
+        self.size = size
+        self.pad = pad
+        self.containment = containment
+        self.postings = {}  # n-грама -> множина ключів
+        self.lengths = {}  # ключ -> кількість різних n-грам
+        self.owners = {}  # ключ -> множина імен контактів
+
+    def ngrams(self, text):
+        if self.pad:
+            text = f' {text} '
+        return {text[i:i + self.size] for i in range(max(len(text) - self.size + 1, 1))}
+
+    def build(self, pairs):
+        self.postings = {}
+        self.lengths = {}
+        self.owners = {}
+        for key, text, owner in pairs:
+            self.add(key, text, owner)
+
+    def add(self, key, text, owner):
+        if key not in self.owners:
+            self.owners[key] = set()
+            grams = self.ngrams(text)
+            self.lengths[key] = len(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(key)
+        self.owners[key].add(owner)
+
+    def remove(self, key, text, owner):
+        owners = self.owners.get(key)
+        if owners is None:
+            return
+        owners.discard(owner)
+        if owners:
+            return
+        del self.owners[key]
+        del self.lengths[key]
+        for gram in self.ngrams(text):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    # скільки n-грам запиту з count має спільних ключ, що відрізняється не більше ніж typos помилками
+    def needed(self, count, typos=1):
+        return max(1, count - typos * self.size)
+
+    def score(self, shared, count, key_count):
+        if self.containment:
+            return shared / count
+        return 2 * shared / (count + key_count)
+
+    # повертає {ім'я контакту: оцінка від cutoff до 1}
+    def find(self, query, typos=1, cutoff=FUZZY_CUTOFF):
+        grams = [self.postings.get(gram, set()) for gram in self.ngrams(query)]
+        grams.sort(key=len)
+        needed = self.needed(len(grams), typos)
+        # ключ, що має needed n-грам запиту, обов'язково є серед найрідкісніших len - needed + 1
+        candidates = set().union(*grams[:len(grams) - needed + 1])
+        result = {}
+        for key in candidates:
+            shared = sum(1 for keys in grams if key in keys)
+            if shared < needed:
+                continue
+            score = self.score(shared, len(grams), self.lengths[key])
+            if score < cutoff:
+                continue
+            for owner in self.owners[key]:
+                result[owner] = max(score, result.get(owner, 0))
+        return result
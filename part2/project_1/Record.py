@@ -1,13 +1,68 @@
 from Field import Name, Phone, Birthday
+from array import array
 from datetime import date
-from decorators import input_error
+from decorators import input_error, notify
 
 
+# компактний запис: телефони - масив цілих чисел, день народження - порядковий номер дня
 class Record:
+    __slots__ = ('name', 'numbers', 'birthday_ordinal', 'book')
+
     def __init__(self, name: str):
         self.name = Name(name)
-        self.phones = []
-        self.birthdays = ""
+        self.numbers = array('Q')
+        self.birthday_ordinal = 0  # 0 - день народження не додано
+        self.book = None  # адресна книга, індекси якої оновлюються при зміні телефонів
+
+    # список телефонів як об'єктів Phone, створюється при зверненні
+    @property
+    def phones(self):
+        return [Phone.from_number(number) for number in self.numbers]
+
+    @property
+    def birthdays(self):
+        return Birthday.from_ordinal(self.birthday_ordinal) if self.birthday_ordinal else ""
+
+    @birthdays.setter
+    def birthdays(self, birthday):
+        self.birthday_ordinal = birthday.ordinal if birthday else 0
+
+    @classmethod
+    def from_state(cls, name: str, numbers: bytes, birthday_ordinal: int):
+        record = cls(name)
+        record.numbers.frombytes(numbers)
+        record.birthday_ordinal = birthday_ordinal
+        return record
+
+    # посилання на книгу не серіалізується разом із записом
+    def __reduce__(self):
+        return Record.from_state, (self.name.get_value, self.numbers.tobytes(), self.birthday_ordinal)
+
+    # стан з pickle-файлів до __slots__: {'name': Name, 'phones': [Phone], 'birthdays': Birthday | ""}
+    def __setstate__(self, state):
+        self.name = state['name']
+        self.numbers = array('Q', (phone.number for phone in state['phones']))
+        self.birthdays = state['birthdays']
+        self.book = None
+
+    # повідомляє книгу про зміну телефону, щоб оновити індекс
+    def phone_changed(self, old_phone=None, new_phone=None):
+        if self.book is not None:
+            self.book.update_phone_index(self.name.get_value, old_phone, new_phone)
+
+    # повідомляє книгу про зміну дня народження, щоб оновити індекс
+    def birthday_changed(self, old_ordinal=0):
+        if self.book is not None:
+            self.book.update_birthday_index(self.name.get_value, old_ordinal, self.birthday_ordinal)
+
+    # позиція телефону в списку або -1
+    def phone_position(self, phone: str):
+        if len(phone) != 10 or not phone.isdigit():
+            return -1
+        try:
+            return self.numbers.index(int(phone))
+        except ValueError:
+            return -1
 
     def __str__(self):
         return f"Name: {self.name}\nPhones: {', '.join(p.get_value for p in self.phones)}\nBirthday: {self.birthdays}"
@@ -17,15 +72,9 @@ class Record:
     def days_to_birthday(self):
         if self.birthdays:
             today = date.today()
-            birhtday = self.birthdays.get_value
-            if today.month > birhtday.month:
-                result = birhtday.replace(year=today.year+1) - today
-                # print(f"{self.name}'s birthday in {result.days} days")
-                return result.days
-            else:
-                result = birhtday.replace(year=today.year) - today
-                # print(f"{self.name}'s birthday in {result.days} days")
-                return result.days
+            result = self.birthdays.next_after(today) - today
+            # print(f"{self.name}'s birthday in {result.days} days")
+            return result.days
         else:
             # print(f"{self.name}'s birthday has not been added")
             return False
@@ -33,46 +82,50 @@ class Record:
     # метод додавання дня народження
     @input_error
     def add_birthday(self, input_date: str):
+        old_ordinal = self.birthday_ordinal
         self.birthdays = Birthday(input_date)
-        print(f"Birthday of {self.name} is already added.")
+        self.birthday_changed(old_ordinal)
+        notify(f"Birthday of {self.name} is already added.")
 
     # метод додавання телефону
     @input_error
     def add_phone(self, input_phone: str):
         phone = Phone(input_phone)
-        if phone.get_value not in [p.get_value for p in self.phones]:
-            self.phones.append(phone)
-            print(f"{phone} successfully added.")
+        if phone.number not in self.numbers:
+            self.numbers.append(phone.number)
+            self.phone_changed(new_phone=phone.get_value)
+            notify(f"{phone} successfully added.")
         else:
             return f"{phone} is already exists."
 
     # видаляє телефон, або виводить, що немає номеру в всписку
     @input_error
     def remove_phone(self, phone: str):
-        if phone in [p.get_value for p in self.phones]:
-            self.phones.remove(
-                self.phones[[p.get_value for p in self.phones].index(phone)])
-            print(f"{phone} successfully removed")
+        position = self.phone_position(phone)
+        if position >= 0:
+            del self.numbers[position]
+            self.phone_changed(old_phone=phone)
+            notify(f"{phone} successfully removed")
         else:
-            print(f"{phone} not found in the list of phones.")
+            notify(f"{phone} not found in the list of phones.")
 
     # редагує номер
     @input_error
     def edit_phone(self, old_phone, new_phone):
         phone = Phone(new_phone)
-        if old_phone in [p.get_value for p in self.phones]:
-            position = [p.get_value for p in self.phones].index(old_phone)
-            self.phones.remove(self.phones[position])
-            self.phones.insert(position, phone)
-            print(f"{phone} successfully adited.")
+        position = self.phone_position(old_phone)
+        if position >= 0:
+            self.numbers[position] = phone.number
+            self.phone_changed(old_phone, phone.get_value)
+            notify(f"{phone} successfully adited.")
         else:
-            print(f"{phone} not found in the list of phones.")
+            notify(f"{phone} not found in the list of phones.")
 
     # пошук номеру телефону
     @input_error
     def find_phone(self, phone):
         phone = Phone(phone)
-        if phone.value in [p.get_value for p in self.phones]:
-            print(f"{self.name.get_value}: {phone}")
+        if self.phone_position(phone.get_value) >= 0:
+            notify(f"{self.name.get_value}: {phone}")
         else:
-            print(f"{phone} not in {self.name.get_value} contacts")
+            notify(f"{phone} not in {self.name.get_value} contacts")
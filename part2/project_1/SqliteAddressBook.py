@@ -0,0 +1,332 @@
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import date
+from itertools import islice
+import heapq
+import re
+import sqlite3
+from Record import Record
+from Index import BirthdayIndex, NgramIndex, FUZZY_CUTOFF
+from decorators import input_error, notify
+from BookBase import BookBase, REGEX_CHARS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    birthday INTEGER,
+    birthday_key INTEGER
+);
+CREATE INDEX IF NOT EXISTS contacts_birthday_key ON contacts (birthday_key);
+CREATE TABLE IF NOT EXISTS phones (
+    contact_id INTEGER NOT NULL REFERENCES contacts (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    phone TEXT NOT NULL,
+    PRIMARY KEY (contact_id, position)
+);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones (phone);
+"""
+
+# повнотекстовий індекс триграм для пошуку за підрядком імені чи номера;
+# ім'я зберігається з пробілами по краях, щоб мати ті самі триграми, що й NgramIndex
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5 (name, phones, tokenize = 'trigram');
+"""
+SEARCH_VERSION = 1  # PRAGMA user_version, з якої ім'я в search доповнене пробілами
+
+LIKE_CHARS = set('%_\\')  # спецсимволи LIKE, що екрануються в like_pattern
+
+RECORD_COLUMNS = """
+    c.name, c.birthday,
+    (SELECT group_concat(phone, ',') FROM (SELECT phone FROM phones WHERE contact_id = c.id ORDER BY position))
+"""
+
+
+# шаблон LIKE для пошуку text як підрядка; спецсимволи LIKE екрануються зворотною скісною рискою
+def like_pattern(text):
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+# словник {ім'я: Record}, що читає і пише записи в SQLite на кожне звернення
+class SqliteRecords(MutableMapping):
+
+    def __init__(self, book):
+        self.book = book
+
+    @property
+    def connection(self):
+        return self.book.connection
+
+    @staticmethod
+    def make_record(name, birthday, phones):
+        record = Record(name)
+        if phones:
+            record.numbers.extend(int(phone) for phone in phones.split(','))
+        record.birthday_ordinal = birthday or 0
+        return record
+
+    def __getitem__(self, name):
+        row = self.connection.execute(f"SELECT {RECORD_COLUMNS} FROM contacts c WHERE c.name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self.make_record(*row)
+
+    # наявний контакт оновлюється на місці, щоб не змінювався його порядок у книзі
+    def __setitem__(self, name, record):
+        birthday_key = BirthdayIndex.day_key(date.fromordinal(record.birthday_ordinal)) if record.birthday_ordinal else None
+        phones = [phone.get_value for phone in record.phones]
+        with self.book.transaction():
+            row = self.connection.execute("SELECT id FROM contacts WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                contact_id = self.connection.execute(
+                    "INSERT INTO contacts (name, birthday, birthday_key) VALUES (?, ?, ?)",
+                    (name, record.birthday_ordinal or None, birthday_key),
+                ).lastrowid
+            else:
+                contact_id = row[0]
+                self.connection.execute(
+                    "UPDATE contacts SET birthday = ?, birthday_key = ? WHERE id = ?",
+                    (record.birthday_ordinal or None, birthday_key, contact_id),
+                )
+                self.connection.execute("DELETE FROM phones WHERE contact_id = ?", (contact_id,))
+                if self.book.fts:
+                    self.connection.execute("DELETE FROM search WHERE rowid = ?", (contact_id,))
+            self.connection.executemany(
+                "INSERT INTO phones (contact_id, position, phone) VALUES (?, ?, ?)",
+                [(contact_id, position, phone) for position, phone in enumerate(phones)],
+            )
+            if self.book.fts:
+                self.connection.execute(
+                    "INSERT INTO search (rowid, name, phones) VALUES (?, ?, ?)",
+                    (contact_id, f' {name.lower()} ', ' '.join(phones)),
+                )
+
+    def __delitem__(self, name):
+        with self.book.transaction():
+            row = self.connection.execute("SELECT id FROM contacts WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                raise KeyError(name)
+            self.remove(row[0])
+
+    def remove(self, contact_id):
+        self.connection.execute("DELETE FROM phones WHERE contact_id = ?", (contact_id,))
+        self.connection.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
+        if self.book.fts:
+            self.connection.execute("DELETE FROM search WHERE rowid = ?", (contact_id,))
+
+    def __contains__(self, name):
+        return self.connection.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        for name, in self.connection.execute("SELECT name FROM contacts ORDER BY id"):
+            yield name
+
+    def __len__(self):
+        return self.connection.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    # записи читаються потоково одним запитом, а не по одному через __getitem__
+    def values(self, limit=-1, offset=0):
+        cursor = self.connection.execute(
+            f"SELECT {RECORD_COLUMNS} FROM contacts c ORDER BY c.id LIMIT ? OFFSET ?", (limit, offset)
+        )
+        return (self.make_record(*row) for row in cursor)
+
+    def items(self):
+        return ((record.name.get_value, record) for record in self.values())
+
+
+# адресна книга в індексованому SQLite-файлі з тим самим API, що й AddressBook;
+# записи не тримаються в пам'яті, а читаються з бази при зверненні
+class SqliteAddressBook(BookBase):
+
+    def __init__(self):
+        super().__init__()
+        self.connection = None
+        self.fts = False
+        self.depth = 0
+        self.names_ngrams = NgramIndex()  # лише для n-грам і оцінок у fuzzy_find
+        self.phones_ngrams = NgramIndex(pad=False, containment=True)
+        self.data = SqliteRecords(self)
+
+    # відкриває (або створює) базу {file_name}.db
+    @input_error
+    def open(self, file_name="backup_address_book"):
+        self.connection = sqlite3.connect(f'{file_name}.db', isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+        try:
+            self.connection.executescript(SEARCH_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite без FTS5 trigram - пошук перебором через LIKE
+            self.fts = False
+        if self.fts and self.connection.execute("PRAGMA user_version").fetchone()[0] < SEARCH_VERSION:
+            self.rebuild_search()
+        self.connection.create_function('regexp', 2, lambda pattern, value: re.search(pattern, value) is not None)
+        print(f"Address book opened from {file_name}.db")
+
+    # переписує search з contacts і phones; потрібно базам, створеним до SEARCH_VERSION
+    def rebuild_search(self):
+        with self.transaction():
+            self.connection.execute("DELETE FROM search")
+            rows = self.connection.execute(
+                "SELECT c.id, c.name, (SELECT group_concat(phone, ' ') FROM "
+                "(SELECT phone FROM phones WHERE contact_id = c.id ORDER BY position)) FROM contacts c"
+            ).fetchall()
+            self.connection.executemany(
+                "INSERT INTO search (rowid, name, phones) VALUES (?, ?, ?)",
+                [(contact_id, f' {name.lower()} ', phones or '') for contact_id, name, phones in rows],
+            )
+            self.connection.execute(f"PRAGMA user_version = {SEARCH_VERSION}")
+
+    # транзакція; вкладені транзакції зливаються із зовнішньою
+    @contextmanager
+    def transaction(self):
+        if self.depth == 0:
+            self.connection.execute("BEGIN IMMEDIATE")
+        self.depth += 1
+        try:
+            yield
+        except BaseException:
+            self.depth -= 1
+            if self.depth == 0:
+                self.connection.execute("ROLLBACK")
+            raise
+        self.depth -= 1
+        if self.depth == 0:
+            self.connection.execute("COMMIT")
+
+    # блокування для читання-зміни-запису - це транзакція SQLite
+    def locked(self):
+        return self.transaction()
+
+    # кожна зміна вже збережена транзакцією, тож ці методи нічого не роблять
+    @property
+    def dirty(self):
+        return False
+
+    def save(self):
+        pass
+
+    def refresh(self):
+        pass
+
+    @input_error
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    # додає запис до адресної книги
+    @input_error
+    def add_record(self, record: Record):
+        self.data[record.name.get_value] = record
+        notify(f"Сontact {record.name.get_value} has been added to the records")
+
+    # додає пакет записів однією транзакцією
+    @input_error
+    def add_records(self, records: list):
+        with self.transaction():
+            for record in records:
+                self.data[record.name.get_value] = record
+
+    # видаляє запис за ім'ям.
+    @input_error
+    def delete(self, name):
+        if name in self.data:
+            del self.data[name]
+            notify(f"{name} is delete")
+        else:
+            notify(f"{name} not found")
+
+    # повертає сторінку number (з нуля) по quantity записів; сторінку книги читає LIMIT/OFFSET
+    @input_error
+    def page(self, number, quantity, records=None):
+        if records is None or records is self.data:
+            return list(self.data.values(quantity, number * quantity))
+        return list(islice(records.values(), number * quantity, (number + 1) * quantity))
+
+    def select(self, where, parameters):
+        cursor = self.connection.execute(f"SELECT {RECORD_COLUMNS} FROM contacts c WHERE {where}", parameters)
+        return {row[0]: SqliteRecords.make_record(*row) for row in cursor}
+
+    # записи з днем народження між датами first і last включно, у порядку настання
+    @input_error
+    def birthdays_between(self, first: date, last: date):
+        result = {}
+        for start, end in BirthdayIndex.segments(first, last):
+            result.update(self.select("c.birthday_key BETWEEN ? AND ? ORDER BY c.birthday_key, c.name", (start, end)))
+        return result
+
+    # пошук одного або кількох користувачів
+    # за кількома цифрами номера телефону або літерами імені;
+    # %, _ і \ у запиті шукаються буквально, як в AddressBook
+    @input_error
+    def find_to_show(self, find_str: str):
+        if REGEX_CHARS & set(find_str):
+            find_dict = self.select("lower(c.name) REGEXP ? ORDER BY c.name", (find_str,))
+        else:
+            query = find_str.lower()
+            pattern = like_pattern(query)
+            digits = pattern if find_str.isdigit() else None
+            # з ESCAPE FTS5 не використовує індекс триграм, тож він додається лише за потреби
+            like = "LIKE ? ESCAPE '\\'" if LIKE_CHARS & set(query) else "LIKE ?"
+            if self.fts:
+                find_dict = self.select(
+                    f"c.id IN (SELECT rowid FROM search WHERE name {like} "
+                    f"UNION SELECT rowid FROM search WHERE phones {like}) ORDER BY c.name",
+                    (pattern, digits),
+                )
+                # ім'я в search доповнене пробілами, тож запит з пробілом по краю відбирається ще раз
+                if not find_str.isdigit():
+                    find_dict = {name: record for name, record in find_dict.items() if query in name.lower()}
+            else:
+                find_dict = self.select(
+                    f"lower(c.name) {like} OR c.id IN (SELECT contact_id FROM phones WHERE phone {like}) ORDER BY c.name",
+                    (pattern, digits),
+                )
+        if len(find_dict) > 0:
+            return find_dict
+        else:
+            print(f"{find_str} not found")
+
+    # оцінки {id контакту: оцінка} за колонкою search; кандидати - рядки зі спільними триграмами (FTS5),
+    # відбір і оцінка ті самі, що в NgramIndex.find
+    def fuzzy_scores(self, column, ngrams, query, candidates):
+        grams = ngrams.ngrams(query)
+        needed = ngrams.needed(len(grams))
+        match = ' OR '.join('{}:"{}"'.format(column, gram.replace('"', '""')) for gram in grams)
+        rows = self.connection.execute(
+            f"SELECT rowid, {column} FROM search WHERE search MATCH ? ORDER BY rank LIMIT ?", (match, candidates)
+        )
+        scores = {}
+        for contact_id, value in rows:
+            for text in value.split() if column == 'phones' else [value.strip()]:
+                text_grams = ngrams.ngrams(text)
+                shared = len(grams & text_grams)
+                if shared < needed:
+                    continue
+                score = ngrams.score(shared, len(grams), len(text_grams))
+                if score >= FUZZY_CUTOFF:
+                    scores[contact_id] = max(score, scores.get(contact_id, 0))
+        return scores
+
+    # нечіткий пошук за триграмами імені та номера, як AddressBook.fuzzy_find
+    @input_error
+    def fuzzy_find(self, query: str, limit=10, candidates=500):
+        query = query.strip().lower()
+        if not self.fts or not query:
+            return []
+        scores = self.fuzzy_scores('name', self.names_ngrams, query, candidates)
+        digits = ''.join(char for char in query if char.isdigit())
+        if len(digits) >= self.phones_ngrams.size:
+            for contact_id, score in self.fuzzy_scores('phones', self.phones_ngrams, digits, candidates).items():
+                scores[contact_id] = max(score, scores.get(contact_id, 0))
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        result = []
+        for contact_id, score in best:
+            name, = self.connection.execute("SELECT name FROM contacts WHERE id = ?", (contact_id,)).fetchone()
+            result.append((self.data[name], score))
+        return result
@@ -0,0 +1,360 @@
+import os
+import pickle
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from Codecs import codecs
+from decorators import profiled, profiler
+
+
+# заголовок запису журналу: довжина даних та їх crc32
+HEADER = struct.Struct('<II')
+
+
+# книгу не можна відкрити без ризику втратити дані; не ValueError, щоб input_error
+# не перетворив її на повідомлення і програма не працювала з порожньою книгою
+class SnapshotError(Exception):
+    pass
+
+
+# журнал змін адресної книги (write-ahead log) з ущільненням у знімок
+class JournalStorage:
+
+    # flush_every - скільки змін накопичувати до fsync, flush_idle - через скільки секунд
+    # простою скинути накопичені зміни на диск (None - не чекати простою)
+    # codec - назва формату знімка з Codecs.codecs
+    def __init__(self, file_name="backup_address_book", compact_limit=1000, flush_every=1, flush_idle=None, codec='pickle'):
+        self.file_name = file_name
+        self.codec = codecs[codec]
+        self.snapshot_path = f'{file_name}{self.codec.extension}'
+        self.source_path = None  # знімок іншого формату, прочитаний замість snapshot_path до ущільнення
+        self.journal_path = f'{file_name}.wal'
+        self.rotated_path = f'{file_name}.wal.old'
+        self.compact_limit = compact_limit
+        self.flush_every = flush_every
+        self.flush_idle = flush_idle
+        self.entries = 0
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.timer = None
+        self.compactor = None
+        self.journal = None
+        self.offset = 0  # кінець уже прочитаної частини журналу
+
+    # відновлює дані: знімок + старий журнал + поточний журнал;
+    # будь-яка помилка читання - SnapshotError, щоб не почати з порожньої книги і не затерти дані
+    @profiled
+    def load(self):
+        try:
+            data = self.read_all()
+            self.journal = open(self.journal_path, 'ab')
+        except SnapshotError:
+            raise
+        except Exception as error:
+            raise SnapshotError(f"Address book {self.file_name} can't be read: {error!r}") from error
+        return data
+
+    def read_all(self):
+        data = {}
+
+        def apply(operation, name, record):
+            if operation == 'put':
+                data[name] = record
+            else:
+                data.pop(name, None)
+
+        path, codec = self.find_snapshot()
+        if path is not None:
+            with open(path, 'rb') as file:
+                for record in codec.load(file):
+                    data[record.name.get_value] = record
+                profiler.record_io(read=file.tell())
+        self.replay(self.rotated_path, apply)
+        self.entries, self.offset = self.replay(self.journal_path, apply)
+        return data
+
+    # знімок у форматі codec; якщо його немає (формат змінили в main.py) - знімок
+    # іншого формату, який перепишеться у новий формат при наступному ущільненні;
+    # кілька знімків інших форматів - неоднозначно, книга не відкривається
+    def find_snapshot(self):
+        if os.path.exists(self.snapshot_path):
+            return self.snapshot_path, self.codec
+        found = [
+            (f'{self.file_name}{codec.extension}', codec)
+            for codec in codecs.values()
+            if codec is not self.codec and os.path.exists(f'{self.file_name}{codec.extension}')
+        ]
+        if len(found) > 1:
+            paths = ', '.join(path for path, _ in found)
+            raise SnapshotError(
+                f"Snapshot {self.snapshot_path} not found and several others exist: {paths}. "
+                "Remove the outdated ones or set CODEC to the format of the right one"
+            )
+        if not found:
+            return None, None
+        self.source_path = found[0][0]
+        return found[0]
+
+    # програє журнал з позиції offset, передаючи кожну зміну в apply;
+    # обрізає пошкоджений хвіст після збою, повертає (кількість змін, кінцева позиція)
+    @profiled
+    def replay(self, path, apply, offset=0):
+        count = 0
+        try:
+            file = open(path, 'r+b')
+        except FileNotFoundError:
+            return count, offset
+        with file:
+            size = os.fstat(file.fileno()).st_size
+            if offset > size:
+                raise ValueError(f"Journal {path} is shorter than the read offset")
+            file.seek(offset)
+            good_offset = offset
+            while True:
+                header = file.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                size, crc = HEADER.unpack(header)
+                payload = file.read(size)
+                if len(payload) < size or zlib.crc32(payload) != crc:
+                    break
+                apply(*pickle.loads(payload))
+                good_offset = file.tell()
+                count += 1
+            file.truncate(good_offset)
+        profiler.record_io(read=good_offset - offset)
+        return count, good_offset
+
+    # дописує одну зміну в журнал; на диск скидає кожні flush_every змін
+    def append(self, operation, name, record=None):
+        self.append_batch([(operation, name, record)])
+
+    # дописує пакет змін (operation, name, record) і скидає його на диск одним fsync
+    @profiled
+    def append_batch(self, changes, sync=False):
+        payloads = [pickle.dumps(change, pickle.HIGHEST_PROTOCOL) for change in changes]
+        with self.lock:
+            for payload in payloads:
+                self.journal.write(HEADER.pack(len(payload), zlib.crc32(payload)))
+                self.journal.write(payload)
+            profiler.record_io(written=sum(HEADER.size + len(payload) for payload in payloads))
+            self.entries += len(payloads)
+            self.pending += len(payloads)
+            if sync or self.pending >= self.flush_every:
+                self.sync()
+        self.schedule_flush()
+
+    # скидає буфер журналу на диск, викликається під self.lock
+    def sync(self):
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.pending = 0
+
+    # скидає на диск усі ще не збережені зміни
+    @profiled
+    def flush(self):
+        with self.lock:
+            if self.pending and self.journal is not None:
+                self.sync()
+
+    # перезапускає таймер простою, після якого накопичені зміни скидаються на диск
+    def schedule_flush(self):
+        if self.flush_idle is None or not self.pending:
+            return
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = threading.Timer(self.flush_idle, self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    # чи настав час ущільнити журнал у знімок
+    def need_compact(self):
+        return self.entries >= self.compact_limit and not self.compacting()
+
+    def compacting(self):
+        return self.compactor is not None and self.compactor.is_alive()
+
+    # ротує журнал і у фоні записує знімок з копії даних
+    @profiled
+    def compact(self, data, background=True):
+        if self.compacting():
+            self.compactor.join()
+        with self.lock:
+            if os.path.exists(self.rotated_path):
+                # попереднє ущільнення не завершилось - дописуємо його у знімок зараз
+                self.write_snapshot(data)
+            self.sync()
+            self.journal.close()
+            os.replace(self.journal_path, self.rotated_path)
+            self.journal = open(self.journal_path, 'ab')
+            self.entries = 0
+            snapshot = dict(data)
+        if background:
+            self.compactor = threading.Thread(target=self.write_snapshot, args=(snapshot,), daemon=True)
+            self.compactor.start()
+        else:
+            self.write_snapshot(snapshot)
+
+    # атомарно замінює знімок і видаляє вже врахований журнал
+    @profiled
+    def write_snapshot(self, data):
+        tmp_path = f'{self.snapshot_path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            self.codec.dump(data, file)
+            profiler.record_io(written=file.tell())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if self.source_path is not None:
+            # знімок старого формату вже переписаний, інакше при поверненні формату він би ожив
+            os.remove(self.source_path)
+            self.source_path = None
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+        self.sync_dir()
+
+    def sync_dir(self):
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.snapshot_path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        self.flush()
+        if self.compacting():
+            self.compactor.join()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+
+# спільний журнал для кількох процесів: запис під файловим блокуванням {file_name}.lock,
+# перед записом процес дочитує чужі зміни з хвоста журналу; у {file_name}.ver -
+# номер покоління журналу і довжина журналу, ущільненого при переході на це покоління
+class SharedJournalStorage(JournalStorage):
+
+    def __init__(self, file_name="backup_address_book", compact_limit=1000, flush_every=1, flush_idle=None, codec='pickle'):
+        super().__init__(file_name, compact_limit, flush_every, flush_idle, codec)
+        self.lock_path = f'{file_name}.lock'
+        self.version_path = f'{file_name}.ver'
+        self.lock = threading.RLock()  # locked() може вкладатися в межах одного потоку
+        self.lock_file = None
+        self.lock_depth = 0
+        self.generation = 0
+        self.apply = None  # apply(operation, name, record) - застосувати чужу зміну
+        self.reload = None  # reload(data) - замінити всі дані після пропущеного ущільнення
+
+    # блокування між процесами; вкладені виклики в одному процесі не блокують повторно
+    @contextmanager
+    def locked(self):
+        import fcntl
+        with self.lock:
+            if self.lock_depth == 0:
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            self.lock_depth += 1
+            try:
+                yield
+            finally:
+                self.lock_depth -= 1
+                if self.lock_depth == 0:
+                    fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def read_version(self):
+        try:
+            with open(self.version_path) as file:
+                generation, compacted = file.read().split()
+                return int(generation), int(compacted)
+        except (FileNotFoundError, ValueError):
+            return 0, 0
+
+    def write_version(self, generation, compacted):
+        tmp_path = f'{self.version_path}.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(f'{generation} {compacted}')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.version_path)
+
+    def load(self):
+        self.lock_file = open(self.lock_path, 'a')
+        with self.locked():
+            self.generation, _ = self.read_version()
+            return super().load()
+
+    # дочитує зміни інших процесів, викликається під locked();
+    # повертає True, якщо дані в пам'яті змінились
+    @profiled
+    def catch_up(self):
+        reloaded = False
+        generation, compacted = self.read_version()
+        if generation != self.generation or self.offset > os.path.getsize(self.journal_path):
+            self.journal.close()
+            self.journal = open(self.journal_path, 'ab')
+            if generation == self.generation + 1 and self.offset == compacted:
+                # інший процес ущільнив журнал, який ми вже прочитали повністю
+                self.offset = 0
+                self.entries = 0
+            else:
+                self.reload(self.read_all())
+                reloaded = True
+            self.generation = generation
+        count, self.offset = self.replay(self.journal_path, self.apply, self.offset)
+        self.entries += count
+        return reloaded or count > 0
+
+    # підхоплює чужі зміни без повного перезавантаження
+    def refresh(self):
+        with self.locked():
+            self.catch_up()
+
+    # у спільному режимі зміни видно іншим процесам одразу, fsync - кожні flush_every змін
+    @profiled
+    def append_batch(self, changes, sync=False):
+        payloads = [pickle.dumps(change, pickle.HIGHEST_PROTOCOL) for change in changes]
+        with self.locked():
+            if self.catch_up():
+                # чужі зміни могли перекрити в пам'яті наші, які записуються після них
+                for change in changes:
+                    self.apply(*change)
+            for payload in payloads:
+                self.journal.write(HEADER.pack(len(payload), zlib.crc32(payload)))
+                self.journal.write(payload)
+            profiler.record_io(written=sum(HEADER.size + len(payload) for payload in payloads))
+            self.journal.flush()
+            self.offset = os.fstat(self.journal.fileno()).st_size
+            self.entries += len(payloads)
+            self.pending += len(payloads)
+            if sync or self.pending >= self.flush_every:
+                self.sync()
+        self.schedule_flush()
+
+    # ущільнення синхронне і під блокуванням: знімок, порожній журнал, нове покоління
+    @profiled
+    def compact(self, data, background=False):
+        with self.locked():
+            self.catch_up()
+            self.sync()
+            self.write_snapshot(dict(data))
+            compacted = self.offset
+            with open(f'{self.journal_path}.tmp', 'wb') as file:
+                os.fsync(file.fileno())
+            os.replace(f'{self.journal_path}.tmp', self.journal_path)
+            self.generation += 1
+            self.write_version(self.generation, compacted)
+            self.sync_dir()
+            self.journal.close()
+            self.journal = open(self.journal_path, 'ab')
+            self.offset = 0
+            self.entries = 0
+
+    def close(self):
+        super().close()
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
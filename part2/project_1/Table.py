@@ -1,5 +1,5 @@
-from rich.table import Table
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 
 
 class CreatingTable(ABC):
@@ -11,21 +11,49 @@ class CreatingTable(ABC):
 
 class BookTable(CreatingTable):
 
+    # data - словник записів або список записів (сторінка)
+    def __init__(self, data, title=None):
+        self.data = data
+        self.title = title
+
+    def get_table(self):
+        from rich.table import Table
+        table = Table(title=self.title, show_header=True, header_style="bold cyan", style="blue")
+        table.add_column("Name", style="bright_magenta")
+        table.add_column("Phone", style="magenta")
+        table.add_column("Birthday", style="cyan")
+
+        records = self.data.values() if isinstance(self.data, Mapping) else self.data
+        for sh in records:
+            table.add_row(
+                f"{sh.name}",
+                f"{', '.join(p.get_value for p in sh.phones)}",
+                f"{sh.birthdays}",
+
+            )
+        return table
+
+
+class SearchTable(CreatingTable):
+
+    # data - список пар (запис, оцінка)
     def __init__(self, data):
         self.data = data
 
     def get_table(self):
+        from rich.table import Table
         table = Table(show_header=True, header_style="bold cyan", style="blue")
+        table.add_column("Score", style="green")
         table.add_column("Name", style="bright_magenta")
         table.add_column("Phone", style="magenta")
         table.add_column("Birthday", style="cyan")
 
-        for sh in self.data.values():
+        for sh, score in self.data:
             table.add_row(
+                f"{score:.2f}",
                 f"{sh.name}",
                 f"{', '.join(p.get_value for p in sh.phones)}",
                 f"{sh.birthdays}",
-
             )
         return table
 
@@ -36,6 +64,7 @@ class HelpTable(CreatingTable):
         self.data = data
 
     def get_table(self):
+        from rich.table import Table
         table = Table(show_header=True, header_style="bold cyan", style="blue")
         table.add_column("Command", style="magenta")
         table.add_column("Description", style="cyan")
@@ -46,3 +75,48 @@ class HelpTable(CreatingTable):
                 f"{description}",
             )
         return table
+
+
+class StatsTable(CreatingTable):
+
+    BARS = ' ▁▂▃▄▅▆▇█'
+
+    # data - список MethodStats з decorators.profiler
+    def __init__(self, data):
+        self.data = data
+
+    # гістограма часу викликів: стовпчик на кожен кошик від найшвидшого до найповільнішого
+    def sparkline(self, histogram):
+        first, last = min(histogram), max(histogram)
+        peak = max(histogram.values())
+        return ''.join(
+            self.BARS[-(-histogram.get(bucket, 0) * (len(self.BARS) - 1) // peak)]
+            for bucket in range(first, last + 1)
+        )
+
+    def get_table(self):
+        from rich.table import Table
+        table = Table(show_header=True, header_style="bold cyan", style="blue")
+        table.add_column("Method", style="bright_magenta")
+        table.add_column("Calls", style="magenta", justify="right")
+        table.add_column("Total ms", style="cyan", justify="right")
+        table.add_column("Mean µs", style="cyan", justify="right")
+        table.add_column("p50 µs", style="cyan", justify="right")
+        table.add_column("p99 µs", style="cyan", justify="right")
+        table.add_column("Histogram", style="green")
+        table.add_column("Read KB", style="magenta", justify="right")
+        table.add_column("Written KB", style="magenta", justify="right")
+
+        for stats in sorted(self.data, key=lambda stats: stats.total, reverse=True):
+            table.add_row(
+                f"{stats.name}",
+                f"{stats.calls}",
+                f"{stats.total * 1000:.1f}",
+                f"{stats.total * 1_000_000 / stats.calls:.0f}",
+                f"≤{stats.percentile(0.5)}",
+                f"≤{stats.percentile(0.99)}",
+                f"{2 ** min(stats.histogram) // 2}µs {self.sparkline(stats.histogram)} {2 ** max(stats.histogram)}µs",
+                f"{stats.bytes_read / 1024:.1f}",
+                f"{stats.bytes_written / 1024:.1f}",
+            )
+        return table
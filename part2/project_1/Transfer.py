@@ -0,0 +1,180 @@
+import csv
+import os
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+from Field import FieldError, Phone, Birthday
+from Record import Record
+from decorators import ErrorReport, quiet
+
+
+class ContactFormat(ABC):
+
+    # читає файл потоково, повертає генератор (номер рядка, ім'я, [телефони], день народження | "")
+    @abstractmethod
+    def read(self, file):
+        pass
+
+    # записує записи у відкритий текстовий файл
+    @abstractmethod
+    def write(self, records, file):
+        pass
+
+
+# CSV з заголовком name,phones,birthday; телефони розділені ';', дата - рік.місяць.день
+class CsvFormat(ContactFormat):
+
+    def read(self, file):
+        reader = csv.DictReader(file)
+        for row in reader:
+            phones = [phone.strip() for phone in (row.get('phones') or '').split(';') if phone.strip()]
+            yield reader.line_num, (row.get('name') or '').strip(), phones, (row.get('birthday') or '').strip()
+
+    def write(self, records, file):
+        writer = csv.writer(file)
+        writer.writerow(['name', 'phones', 'birthday'])
+        for record in records:
+            birthday = record.birthdays.get_value.strftime('%Y.%m.%d') if record.birthday_ordinal else ''
+            writer.writerow([record.name.get_value, ';'.join(p.get_value for p in record.phones), birthday])
+
+
+# vCard 3.0: з картки беруться FN, TEL та BDAY (рррр-мм-дд або ррррммдд)
+class VCardFormat(ContactFormat):
+
+    def read(self, file):
+        card = None
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            key, _, value = line.partition(':')
+            key = key.split(';')[0].upper()
+            if key == 'BEGIN':
+                card = [line_number, '', [], '']
+            elif card is None:
+                continue
+            elif key == 'FN':
+                card[1] = value.strip()
+            elif key == 'TEL':
+                card[2].append(''.join(char for char in value if char.isdigit()))
+            elif key == 'BDAY':
+                value = value.strip().replace('-', '')
+                card[3] = f'{value[:4]}.{value[4:6]}.{value[6:8]}' if len(value) == 8 else value
+            elif key == 'END':
+                yield tuple(card)
+                card = None
+
+    def write(self, records, file):
+        for record in records:
+            file.write('BEGIN:VCARD\nVERSION:3.0\n')
+            file.write(f'FN:{record.name.get_value}\n')
+            for phone in record.phones:
+                file.write(f'TEL;TYPE=CELL:{phone.get_value}\n')
+            if record.birthday_ordinal:
+                file.write(f'BDAY:{record.birthdays.get_value.isoformat()}\n')
+            file.write('END:VCARD\n')
+
+
+formats = {
+    '.csv': CsvFormat(),
+    '.vcf': VCardFormat(),
+}
+
+
+def get_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in formats:
+        raise ValueError(f"Unsupported file format {extension}, use {', '.join(formats)}")
+    return formats[extension]
+
+
+# перетворює пакет рядків на записи; телефони і дати всього пакета перевіряються
+# стовпцями через validate_many, а не по одному; невалідні поля потрапляють у звіт errors,
+# рядок з хоча б одним невалідним полем відкидається
+def make_records(chunk, errors):
+    numbers, phones_rejected = Phone.validate_many([phone for _, _, phones, _ in chunk for phone in phones])
+    ordinals, birthdays_rejected = Birthday.validate_many([birthday for _, _, _, birthday in chunk if birthday])
+    numbers, ordinals = iter(numbers), iter(ordinals)
+    phone_position = birthday_position = 0
+    records = []
+    for line, name, phones, birthday in chunk:
+        errors.row = line
+        record = None
+        try:
+            record = Record(name)
+        except FieldError as error:
+            errors.add(error.field, str(error))
+        valid = record is not None
+        for phone in phones:
+            if phones_rejected[phone_position]:
+                errors.add('phone', f"Phone {phone} isn't valid")
+                valid = False
+            else:
+                number = next(numbers)
+                if valid and number not in record.numbers:
+                    record.numbers.append(number)
+            phone_position += 1
+        if birthday:
+            if birthdays_rejected[birthday_position]:
+                errors.add('birthday', f"Date {birthday} isn't valid, should be: year.month.day")
+                valid = False
+            else:
+                ordinal = next(ordinals)
+                if valid:
+                    record.birthday_ordinal = ordinal
+            birthday_position += 1
+        if valid:
+            records.append(record)
+    return records
+
+
+# звіт про імпорт: кількість рядків, помилки полів (рядок, поле, повідомлення) і швидкість
+class ImportReport:
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.errors = ErrorReport()
+        self.batches = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0
+
+    @property
+    def throughput(self):
+        return (self.imported + self.rejected) / self.elapsed if self.elapsed else 0
+
+    def __str__(self):
+        lines = [
+            f"Imported {self.imported} contacts in {self.batches} batches, rejected {self.rejected} rows",
+            f"{self.elapsed:.2f} s, {self.throughput:.0f} rows/s",
+        ]
+        lines.extend(f"  line {row}, {field}: {message}" for row, field, message in self.errors.errors[:20])
+        if len(self.errors) > 20:
+            lines.append(f"  ... and {len(self.errors) - 20} more")
+        return '\n'.join(lines)
+
+
+# імпортує файл пакетами по batch_size записів, книга зберігається раз на пакет
+def import_contacts(book, path, batch_size=1000):
+    contact_format = get_format(path)
+    report = ImportReport()
+    with open(path, newline='', encoding='utf-8') as file, quiet(report.errors):
+        rows = contact_format.read(file)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            batch = make_records(chunk, report.errors)
+            report.rejected += len(chunk) - len(batch)
+            if batch:
+                book.add_records(batch)
+                report.imported += len(batch)
+                report.batches += 1
+    report.elapsed = time.perf_counter() - report.started
+    return report
+
+
+# експортує всі записи книги у файл
+def export_contacts(book, path):
+    contact_format = get_format(path)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        contact_format.write(book.data.values(), file)
+    return len(book.data)
@@ -0,0 +1,429 @@
+import argparse
+import multiprocessing
+import contextlib
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from AddressBook import AddressBook
+from Codecs import codecs
+from SqliteAddressBook import SqliteAddressBook
+from Record import Record
+from Field import Phone, Birthday
+from decorators import quiet
+
+
+# синтетичний контакт з номером телефону за індексом
+def make_record(index):
+    record = Record(f'contact{index}')
+    record.add_phone(f'{index % 10 ** 10:010d}')
+    return record
+
+
+def make_book(size):
+    book = AddressBook()
+    for index in range(size):
+        record = make_record(index)
+        book.data[record.name.get_value] = record
+    book.build_index()
+    return book
+
+
+# середній час однієї правки: повне перечитування та перезапис .pkl
+def bench_pickle(size, edits, directory):
+    file_name = os.path.join(directory, 'pickle_book')
+    make_book(size).to_pickle(file_name)
+    start = time.perf_counter()
+    for index in range(edits):
+        book = AddressBook()
+        book.from_pickle(file_name)
+        book.add_record(make_record(size + index))
+        book.to_pickle(file_name)
+    return (time.perf_counter() - start) / edits
+
+
+# середній час однієї правки: дописування запису в журнал з fsync
+def bench_journal(size, edits, directory):
+    file_name = os.path.join(directory, 'journal_book')
+    make_book(size).to_pickle(file_name)
+    book = AddressBook()
+    book.from_journal(file_name)
+    start = time.perf_counter()
+    for index in range(edits):
+        book.add_record(make_record(size + index))
+    elapsed = time.perf_counter() - start
+    book.storage.close()
+    return elapsed / edits
+
+
+def storage(args):
+    print(f'{"contacts":>10} {"pickle, ms":>12} {"journal, ms":>12}')
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            pickle_time = bench_pickle(size, args.edits, directory)
+            journal_time = bench_journal(size, args.edits, directory)
+        print(f'{size:>10} {pickle_time * 1000:>12.3f} {journal_time * 1000:>12.3f}')
+
+
+# час пошуку find_to_show: через індекси та перебором регулярним виразом
+def search(args):
+    queries = ['tact123', '4567', 'contact99']
+    print(f'{"contacts":>10} {"index, ms":>12} {"regex scan, ms":>15}')
+    for size in args.sizes:
+        with contextlib.redirect_stdout(io.StringIO()):
+            book = make_book(size)
+            start = time.perf_counter()
+            for query in queries:
+                book.find_to_show(query)
+            index_time = (time.perf_counter() - start) / len(queries)
+            start = time.perf_counter()
+            for query in queries:
+                book.find_to_show(f'({query})')
+            scan_time = (time.perf_counter() - start) / len(queries)
+        print(f'{size:>10} {index_time * 1000:>12.3f} {scan_time * 1000:>15.3f}')
+
+
+# пам'ять на один контакт з телефоном і днем народження
+def memory(args):
+    print(f'{"contacts":>10} {"bytes/contact":>14}')
+    for size in args.sizes:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            records = []
+            for index in range(size):
+                record = make_record(index)
+                record.add_birthday(f'{1950 + index % 50}.{index % 12 + 1:02d}.{index % 28 + 1:02d}')
+                records.append(record)
+            used, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        print(f'{size:>10} {used / size:>14.1f}')
+
+
+# час збереження і десеріалізації (без побудови індексів) та розмір файлу для кожного формату
+def codec(args):
+    print(f'{"contacts":>10} {"codec":>8} {"save, s":>9} {"load, s":>9} {"size, MB":>10}')
+    for size in args.sizes:
+        with contextlib.redirect_stdout(io.StringIO()):
+            book = make_book(size)
+            for index, record in enumerate(book.data.values()):
+                record.add_birthday(f'{1950 + index % 50}.{index % 12 + 1:02d}.{index % 28 + 1:02d}')
+        with tempfile.TemporaryDirectory() as directory:
+            for name in args.codecs:
+                file_name = os.path.join(directory, 'book')
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    book.to_file(file_name, name)
+                    save_time = time.perf_counter() - start
+                path = f'{file_name}{codecs[name].extension}'
+                start = time.perf_counter()
+                with open(path, 'rb') as file:
+                    loaded = {record.name.get_value: record for record in codecs[name].load(file)}
+                load_time = time.perf_counter() - start
+                assert len(loaded) == size
+                file_size = os.path.getsize(path)
+                print(f'{size:>10} {name:>8} {save_time:>9.3f} {load_time:>9.3f} {file_size / 2 ** 20:>10.2f}')
+
+
+# час до першого запрошення: імпорт main, завантаження книги з журналу, HandlerFactory;
+# плюс звіт python -X importtime з найдорожчими імпортами
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+book = main.AddressBook()
+book.from_journal({file_name!r})
+factory = main.HandlerFactory(book)
+print(time.perf_counter() - start)
+"""
+
+
+def startup(args):
+    project = os.path.dirname(os.path.abspath(__file__))
+    report = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=project, capture_output=True, text=True,
+    ).stderr
+    imports = []
+    for line in report.splitlines()[1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, module = line.split('|')
+        # main має у звіті відступ в один пробіл, кожен рівень вкладеності - ще два
+        if len(module) - len(module.lstrip()) <= 3:
+            imports.append((int(cumulative), module.strip()))
+    print(f'{"cumulative, ms":>15}  import')
+    for cumulative, module in sorted(imports, reverse=True)[:args.top]:
+        print(f'{cumulative / 1000:>15.1f}  {module}')
+
+    print(f'\n{"contacts":>10} {"to prompt, s":>13}')
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'book')
+            with contextlib.redirect_stdout(io.StringIO()):
+                make_book(size).to_pickle(file_name)
+            elapsed = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT.format(file_name=file_name)],
+                cwd=project, capture_output=True, text=True,
+            ).stdout.splitlines()[-1]
+        print(f'{size:>10} {float(elapsed):>13.3f}')
+
+
+SYLLABLES = ['an', 'na', 'ol', 'ek', 'san', 'dr', 'ma', 'ri', 'ia', 'iv', 'ko', 'len', 'to', 'ser', 'hii', 'bo', 'hd', 'yu', 'lia', 'ta']
+
+
+# книга з різноманітними іменами з випадкових складів
+def make_random_book(size, seed=1):
+    rng = random.Random(seed)
+    book = AddressBook()
+    while len(book.data) < size:
+        record = Record(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))) + str(rng.randint(0, 99)))
+        record.numbers.append(rng.randrange(10 ** 10))
+        book.data[record.name.get_value] = record
+    book.build_index()
+    return book, rng
+
+
+# затримка нечіткого пошуку за триграмами для запитів з помилками
+def fuzzy(args):
+    print(f'{"contacts":>10} {"build, s":>9} {"query, ms":>10}')
+    for size in args.sizes:
+        start = time.perf_counter()
+        book, rng = make_random_book(size)
+        build_time = time.perf_counter() - start
+        names = list(book.data)
+        queries = []
+        for _ in range(args.queries):
+            name = list(rng.choice(names).lower())
+            name[rng.randrange(len(name))] = rng.choice('aeiou')  # одна помилка в імені
+            queries.append(''.join(name))
+        start = time.perf_counter()
+        for query in queries:
+            book.fuzzy_find(query)
+        query_time = (time.perf_counter() - start) / len(queries)
+        print(f'{size:>10} {build_time:>9.2f} {query_time * 1000:>10.3f}')
+
+
+# процес-записувач спільної книги: нові контакти та телефони до одного спільного контакту
+def shared_writer(file_name, worker, edits, compact_limit):
+    with contextlib.redirect_stdout(io.StringIO()):
+        book = AddressBook()
+        book.from_journal(file_name, shared=True)
+        book.storage.compact_limit = compact_limit
+        for index in range(edits):
+            book.add_record(Record(f'worker{worker}x{index}'))
+            with book.locked():
+                record = book.find('Shared')
+                record.add_phone(f'{worker * edits + index:010d}')
+                book.add_record(record)
+        book.close()
+
+
+# стрес-тест: багато процесів одночасно пишуть в одну книгу, жодна зміна не має загубитись
+def shared(args):
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        file_name = os.path.join(directory, 'book')
+        book = AddressBook()
+        book.from_journal(file_name, shared=True)
+        book.add_record(Record('shared'))
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=shared_writer, args=(file_name, worker, args.edits, args.compact_limit))
+            for worker in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        book.refresh()
+        contacts = len(book.data) - 1
+        phones = len(book.find('Shared').numbers)
+        book.close()
+        reloaded = AddressBook()
+        reloaded.from_journal(file_name)
+        reloaded_contacts = len(reloaded.data) - 1
+        reloaded.close()
+    expected = args.workers * args.edits
+    changes = expected * 2
+    print(f'{args.workers} writers x {args.edits} edits: {elapsed:.2f} s, {changes / elapsed:.0f} changes/s')
+    print(f'contacts {contacts}/{expected}, shared phones {phones}/{expected}, after reload {reloaded_contacts}/{expected}')
+    if contacts != expected or phones != expected or reloaded_contacts != expected:
+        sys.exit('lost updates detected')
+
+
+# затримки операцій книги: (відкриття + перший пошук, find, find_to_show, add_record), с
+def book_latencies(open_book, size, repeats=20):
+    start = time.perf_counter()
+    book = open_book()
+    book.find_to_show('tact1234')
+    first_query = time.perf_counter() - start
+    start = time.perf_counter()
+    for index in range(repeats):
+        book.find(f'Contact{index * 7919 % size}')
+    find_time = (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for index in range(repeats):
+        # без нулів: синтетичні номери мають провідні нулі, і такий запит збігся б майже з усіма
+        book.find_to_show(str(index * 7919 % 9000 + 1000).replace('0', '1'))
+    search_time = (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for index in range(repeats):
+        book.add_record(make_record(size + index))
+    add_time = (time.perf_counter() - start) / repeats
+    book.close()
+    return first_query, find_time, search_time, add_time
+
+
+# SQLite-книга проти книги в пам'яті з pickle-знімком
+def sqlite(args):
+    print(f'{"contacts":>10} {"backend":>8} {"open+query, s":>14} {"find, ms":>9} {"search, ms":>11} {"add, ms":>8} {"size, MB":>9}')
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()) as output:
+            file_name = os.path.join(directory, 'book')
+            book = SqliteAddressBook()
+            book.open(file_name)
+            for first in range(0, size, 10000):
+                book.add_records([make_record(index) for index in range(first, min(first + 10000, size))])
+            book.close()
+            rows = []
+
+            def open_sqlite():
+                opened = SqliteAddressBook()
+                opened.open(file_name)
+                return opened
+
+            rows.append(('sqlite', book_latencies(open_sqlite, size), os.path.getsize(f'{file_name}.db')))
+            if size <= args.pickle_limit:
+                make_book(size).to_pickle(file_name)
+
+                def open_pickle():
+                    opened = AddressBook()
+                    opened.from_journal(file_name)
+                    return opened
+
+                rows.append(('pickle', book_latencies(open_pickle, size), os.path.getsize(f'{file_name}.pkl')))
+            output.truncate(0)
+        for backend, (first_query, find_time, search_time, add_time), file_size in rows:
+            print(
+                f'{size:>10} {backend:>8} {first_query:>14.3f} {find_time * 1000:>9.3f} '
+                f'{search_time * 1000:>11.3f} {add_time * 1000:>8.3f} {file_size / 2 ** 20:>9.1f}'
+            )
+
+
+# calls викликів Record.add_phone, кожен invalid-й номер невалідний; по phones номерів на запис
+def add_phones(calls, invalid, phones=10):
+    records = [Record(f'contact{index}') for index in range(calls // phones)]
+    start = time.perf_counter()
+    for index in range(calls):
+        number = f'{index:09d}' if index % invalid == 0 else f'{index:010d}'
+        records[index // phones].add_phone(number)
+    return time.perf_counter() - start
+
+
+# масове додавання телефонів: звичайний режим з виводом (у /dev/null) проти тихого режиму зі звітом
+def bulk(args):
+    print(f'{"calls":>10} {"mode":>7} {"time, s":>8} {"calls/s":>10} {"errors":>7}')
+    for calls in args.sizes:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            print_time = add_phones(calls, args.invalid)
+        with quiet() as report:
+            quiet_time = add_phones(calls, args.invalid)
+        print(f'{calls:>10} {"print":>7} {print_time:>8.2f} {calls / print_time:>10.0f} {"-":>7}')
+        print(f'{calls:>10} {"quiet":>7} {quiet_time:>8.2f} {calls / quiet_time:>10.0f} {len(report):>7}')
+
+
+# перевірка по одному через конструктор поля, як у Phone(value) / Birthday(value)
+def validate_each(field, values):
+    valid = []
+    with quiet():
+        for value in values:
+            try:
+                valid.append(field(value))
+            except ValueError:
+                pass
+    return valid
+
+
+# пакетна перевірка стовпців телефонів і дат проти сеттерів по одному
+def validate(args):
+    print(f'{"values":>10} {"field":>9} {"setters, s":>11} {"batch, s":>9} {"speedup":>8} {"rejected":>9}')
+    for size in args.sizes:
+        columns = {
+            'phone': [f'{index:09d}' if index % args.invalid == 0 else f'{index:010d}' for index in range(size)],
+            'birthday': [
+                f'{1930 + index % 90}.{index % 12 + 1:02d}.{index % 31 + 1:02d}'
+                if index % args.invalid else f'{index % 31}/{index % 12}' for index in range(size)
+            ],
+        }
+        for name, field in (('phone', Phone), ('birthday', Birthday)):
+            start = time.perf_counter()
+            validate_each(field, columns[name])
+            each_time = time.perf_counter() - start
+            start = time.perf_counter()
+            _, rejected = field.validate_many(columns[name])
+            batch_time = time.perf_counter() - start
+            print(
+                f'{size:>10} {name:>9} {each_time:>11.2f} {batch_time:>9.3f} '
+                f'{each_time / batch_time:>7.1f}x {sum(rejected):>9}'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Address book benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    storage_parser = commands.add_parser('storage', help='per-edit latency: pickle rewrite vs journal append')
+    storage_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    storage_parser.add_argument('--edits', type=int, default=20)
+    storage_parser.set_defaults(run=storage)
+
+    search_parser = commands.add_parser('search', help='find_to_show latency: indexes vs regex scan')
+    search_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    search_parser.set_defaults(run=search)
+
+    memory_parser = commands.add_parser('memory', help='bytes per contact of the in-memory Record representation')
+    memory_parser.add_argument('--sizes', type=int, nargs='+', default=[1000000])
+    memory_parser.set_defaults(run=memory)
+
+    codec_parser = commands.add_parser('codec', help='save/load time and file size per serialization format')
+    codec_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    codec_parser.add_argument('--codecs', nargs='+', choices=list(codecs), default=list(codecs))
+    codec_parser.set_defaults(run=codec)
+
+    startup_parser = commands.add_parser('startup', help='import-time report and time to the first prompt')
+    startup_parser.add_argument('--sizes', type=int, nargs='+', default=[0, 100000])
+    startup_parser.add_argument('--top', type=int, default=10)
+    startup_parser.set_defaults(run=startup)
+
+    fuzzy_parser = commands.add_parser('fuzzy', help='ranked trigram search latency for misspelled names')
+    fuzzy_parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    fuzzy_parser.add_argument('--queries', type=int, default=100)
+    fuzzy_parser.set_defaults(run=fuzzy)
+
+    shared_parser = commands.add_parser('shared', help='stress test: concurrent writer processes on one shared book')
+    shared_parser.add_argument('--workers', type=int, default=16)
+    shared_parser.add_argument('--edits', type=int, default=100)
+    shared_parser.add_argument('--compact-limit', type=int, default=300)
+    shared_parser.set_defaults(run=shared)
+
+    sqlite_parser = commands.add_parser('sqlite', help='SQLite backend vs in-memory pickle/journal backend')
+    sqlite_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000, 10000000])
+    sqlite_parser.add_argument('--pickle-limit', type=int, default=1000000, help='skip the in-memory backend above this size')
+    sqlite_parser.set_defaults(run=sqlite)
+
+    bulk_parser = commands.add_parser('bulk', help='Record.add_phone throughput: printing vs quiet mode with an error report')
+    bulk_parser.add_argument('--sizes', type=int, nargs='+', default=[1000000])
+    bulk_parser.add_argument('--invalid', type=int, default=10, help='every N-th phone is invalid')
+    bulk_parser.set_defaults(run=bulk)
+
+    validate_parser = commands.add_parser('validate', help='Field.validate_many on whole columns vs per-object setters')
+    validate_parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    validate_parser.add_argument('--invalid', type=int, default=10, help='every N-th value is invalid')
+    validate_parser.set_defaults(run=validate)
+
+    arguments = parser.parse_args()
+    arguments.run(arguments)
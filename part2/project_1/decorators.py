@@ -1,23 +1,163 @@
-def input_error(func):
-    def wrapper(*args):
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+# статистика одного методу: виклики, час, гістограма часу (кошики по степенях двійки мкс), байти вводу-виводу
+class MethodStats:
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.histogram = {}  # номер кошика -> кількість викликів; кошик b - до 2**b мкс
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def add(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        bucket = int(elapsed * 1_000_000).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    # верхня межа кошика, в який потрапляє частка share викликів, мкс
+    def percentile(self, share):
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= share * self.calls:
+                return 2 ** bucket
+        return 0
+
+
+# профілювання вимкнене за замовчуванням, і тоді обгортка лише перевіряє прапорець
+class Profiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def get(self, name):
+        with self.lock:
+            if name not in self.stats:
+                self.stats[name] = MethodStats(name)
+            return self.stats[name]
+
+    def call(self, func, args, kwargs):
+        stats = self.get(func.__qualname__)
+        stack = self.local.__dict__.setdefault('stack', [])
+        stack.append(stats)
+        start = time.perf_counter()
         try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self.lock:
+                stats.add(elapsed)
+
+    # зараховує байти, прочитані чи записані на диск, поточному методу в цьому потоці
+    def record_io(self, read=0, written=0):
+        if not self.enabled:
+            return
+        stack = self.local.__dict__.get('stack')
+        if not stack:
+            return
+        with self.lock:
+            stack[-1].bytes_read += read
+            stack[-1].bytes_written += written
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+
+profiler = Profiler()
+
+
+# рахує виклики і час методу, коли профілювання увімкнене
+def profiled(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return func(*args, **kwargs)
+        return profiler.call(func, args, kwargs)
+
+    return wrapper
 
-            return func(*args)
-        except IndexError as index_ex_message:
-            return index_ex_message
-        except ValueError as val_ex_message:
-            return val_ex_message
-        except KeyError as key_ex_message:
-            return key_ex_message
-        except TypeError as type_ex_message:
-            return type_ex_message
-        except AttributeError as atr_ex_message:
-            return atr_ex_message
-        except ZeroDivisionError as zero_div_ex_message:
-            return zero_div_ex_message
-        except FileNotFoundError as file_not_found_ex_message:
-            return file_not_found_ex_message
-        except PermissionError as permission_ex_message:
-            return permission_ex_message
+
+# помилки, які input_error повертає як значення замість винятку
+HANDLED_ERRORS = (
+    IndexError,
+    ValueError,
+    KeyError,
+    TypeError,
+    AttributeError,
+    ZeroDivisionError,
+    FileNotFoundError,
+    PermissionError,
+)
+
+
+# звіт тихого режиму: помилки валідації (рядок, поле, повідомлення);
+# row виставляє той, хто обробляє пакет, перед обробкою кожного рядка
+class ErrorReport:
+
+    def __init__(self):
+        self.row = None
+        self.errors = []
+
+    def add(self, field, message):
+        self.errors.append((self.row, field, message))
+
+    def __len__(self):
+        return len(self.errors)
+
+    def __iter__(self):
+        return iter(self.errors)
+
+    def __str__(self):
+        return '\n'.join(f"row {row}, {field}: {message}" for row, field, message in self.errors)
+
+
+bulk = threading.local()  # bulk.report - ErrorReport тихого режиму в цьому потоці
+
+
+# тихий режим для пакетних операцій: методи нічого не виводять,
+# а помилки, перехоплені input_error, додаються у звіт
+@contextmanager
+def quiet(report=None):
+    report = ErrorReport() if report is None else report
+    previous = getattr(bulk, 'report', None)
+    bulk.report = report
+    try:
+        yield report
+    finally:
+        bulk.report = previous
+
+
+# print, що мовчить у тихому режимі
+def notify(*args):
+    if getattr(bulk, 'report', None) is None:
+        print(*args)
+
+
+# повертає помилку як значення, а в тихому режимі записує її у звіт і повертає None;
+# профілювання перевіряється в тій самій обгортці, без окремого рівня виклику
+def input_error(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            if profiler.enabled:
+                return profiler.call(func, args, kwargs)
+            return func(*args, **kwargs)
+        except HANDLED_ERRORS as error:
+            report = getattr(bulk, 'report', None)
+            if report is None:
+                return error
+            report.add(getattr(error, 'field', func.__name__), str(error))
 
     return wrapper
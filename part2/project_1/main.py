@@ -1,34 +1,78 @@
+import sys
 from CommandHandler import handlers_dict
+from AddressBook import AddressBook
+from Storage import SnapshotError
+from decorators import profiler
 from prompt_toolkit import prompt
 from prompt_toolkit.completion import WordCompleter
-from art import *
+
+
+FLUSH_EVERY = 50  # скидати зміни на диск кожні N змін
+FLUSH_IDLE = 5  # або після N секунд без змін
+CODEC = 'pickle'  # формат знімка книги: 'pickle', 'binary' або 'jsonl'
+SHARED = False  # True - книгу одночасно відкривають кілька терміналів
+BACKEND = 'journal'  # 'journal' - книга в пам'яті з журналом змін, 'sqlite' - книга в SQLite-файлі
+PROFILE = False  # True - з запуску рахувати виклики і час методів (команда stats вмикає і пізніше)
 
 
 class HandlerFactory:
 
-    @staticmethod
-    def create_handler(command):
+    def __init__(self, book: AddressBook):
+        self.book = book
+        self.handlers = {}  # створені обробники, по одному на команду
+
+    def create_handler(self, command):
+        handler = self.handlers.get(command)
+        if handler:
+            return handler
         handler_class = handlers_dict.get(command)
         if handler_class:
-            return handler_class
+            handler = handler_class()
+            handler.book = self.book
+            self.handlers[command] = handler
+            return handler
         else:
             return None
 
 
+# art підвантажує всі шрифти, тому імпортується лише для банера
+def show_banner():
+    from art import tprint
+    tprint("Personal    assistant")
+
+
 if __name__ == "__main__":
 
-    tprint("Personal    assistant")
+    show_banner()
+    profiler.enabled = PROFILE
+
+    if BACKEND == 'sqlite':
+        from SqliteAddressBook import SqliteAddressBook
+        book = SqliteAddressBook()
+        book.open()
+    else:
+        book = AddressBook()
+        try:
+            book.from_journal(flush_every=FLUSH_EVERY, flush_idle=FLUSH_IDLE, codec=CODEC, shared=SHARED)
+        except SnapshotError as error:
+            print(f"{error}.")
+            sys.exit(1)
+    factory = HandlerFactory(book)
 
     word_completer = WordCompleter(handlers_dict.keys())
-    show_help_table = HandlerFactory.create_handler('help')
+    show_help_table = factory.create_handler('help')
     show_help_table.handler()
 
-    while True:
-        command = prompt("Input command>>> ", completer=word_completer)
-        command.lower()
+    try:
+        while True:
+            command = prompt("Input command>>> ", completer=word_completer)
+            command.lower()
+            book.refresh()
 
-        handler = HandlerFactory.create_handler(command)
-        handler.handler() if handler else print("Invalid command")
+            handler = factory.create_handler(command)
+            handler.handler() if handler else print("Invalid command")
 
-        if command == "exit":
-            break
+            if command == "exit":
+                break
+    finally:
+        book.close()
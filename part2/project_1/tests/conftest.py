@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# модулі книги імпортуються як верхньорівневі (from AddressBook import ...), як у main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
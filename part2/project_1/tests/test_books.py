@@ -0,0 +1,38 @@
+import pytest
+
+from AddressBook import AddressBook
+from Record import Record
+from SqliteAddressBook import SqliteAddressBook
+
+CONTACTS = [
+    ('ivan', '0501234567'),
+    ('iv_an', '0502345678'),
+    ('50%off', '0673456789'),
+    ('back\\slash', '0934567890'),
+    ('maria ivanenko', '0675678901'),
+]
+
+
+def fill(book):
+    for name, phone in CONTACTS:
+        record = Record(name)
+        record.add_phone(phone)
+        book.add_record(record)
+    return book
+
+
+@pytest.fixture(params=['fts', 'like'])
+def sqlite_book(request, tmp_path):
+    book = SqliteAddressBook()
+    book.open(str(tmp_path / 'book'))
+    # без FTS5 книга шукає через LIKE по contacts і phones
+    book.fts = request.param == 'fts'
+    yield fill(book)
+    book.close()
+
+
+@pytest.mark.parametrize('query', ['_', '%', 'v_a', '0%o', 'iv', 'an', 'ivan', 'n ', ' i', '0567', '67'])
+def test_find_to_show_matches_in_memory_book(sqlite_book, query):
+    expected = fill(AddressBook()).find_to_show(query)
+    found = sqlite_book.find_to_show(query)
+    assert sorted(found or {}) == sorted(expected or {})
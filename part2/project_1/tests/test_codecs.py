@@ -0,0 +1,40 @@
+import io
+import struct
+
+import pytest
+
+from Codecs import codecs
+from Record import Record
+
+
+def round_trip(codec, records):
+    file = io.BytesIO()
+    codecs[codec].dump({record.name.get_value: record for record in records}, file)
+    file.seek(0)
+    return list(codecs[codec].load(file))
+
+
+@pytest.mark.parametrize('phones', [255, 256, 300])
+def test_binary_keeps_records_with_many_phones(phones):
+    record = Record('busy')
+    record.numbers.extend(range(phones))
+    loaded, = round_trip('binary', [record])
+    assert list(loaded.numbers) == list(range(phones))
+
+
+@pytest.mark.parametrize('size', [0xFFFF, 0x10000])
+def test_binary_keeps_long_names(size):
+    record = Record('n' * size)
+    record.birthday_ordinal = 730000
+    loaded, following = round_trip('binary', [record, Record('next')])
+    assert loaded.name.get_value == record.name.get_value
+    assert loaded.birthday_ordinal == 730000
+    assert following.name.get_value == 'Next'
+
+
+def test_binary_reads_abk1_files():
+    name = 'Ivan'.encode('utf-8')
+    data = b'ABK1' + struct.pack('<HB', len(name), 1) + name + struct.pack('<Q', 501234567) + struct.pack('<I', 0)
+    loaded, = codecs['binary'].load(io.BytesIO(data))
+    assert loaded.name.get_value == 'Ivan'
+    assert list(loaded.numbers) == [501234567]
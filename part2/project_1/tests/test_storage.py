@@ -0,0 +1,37 @@
+import zlib
+
+import pytest
+
+from AddressBook import AddressBook
+from Record import Record
+from Storage import HEADER, SnapshotError
+
+
+def test_corrupt_snapshot_is_not_opened_as_empty_book(tmp_path):
+    (tmp_path / 'book.pkl').write_bytes(b'not a pickle')
+    with pytest.raises(SnapshotError):
+        AddressBook().from_journal(str(tmp_path / 'book'))
+    assert (tmp_path / 'book.pkl').read_bytes() == b'not a pickle'
+
+
+def test_unreadable_journal_entry_is_not_skipped(tmp_path):
+    book = AddressBook()
+    book.from_journal(str(tmp_path / 'book'))
+    book.add_record(Record('ivan'))
+    book.close()
+    payload = b'\x80\x05broken'
+    with open(tmp_path / 'book.wal', 'ab') as journal:
+        journal.write(HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+    with pytest.raises(SnapshotError):
+        AddressBook().from_journal(str(tmp_path / 'book'))
+
+
+def test_book_reopens_with_its_changes(tmp_path):
+    book = AddressBook()
+    book.from_journal(str(tmp_path / 'book'))
+    book.add_record(Record('ivan'))
+    book.close()
+    reopened = AddressBook()
+    reopened.from_journal(str(tmp_path / 'book'))
+    assert list(reopened.data) == ['Ivan']
+    reopened.close()
@@ -0,0 +1,21 @@
+from Transfer import import_contacts
+from AddressBook import AddressBook
+
+
+def test_import_rejects_bad_rows_and_keeps_the_rest(tmp_path):
+    path = tmp_path / 'contacts.csv'
+    path.write_text(
+        'name,phones,birthday\n'
+        'ivan,0501234567,1990.01.02\n'
+        'petro,²²²²²²²²²²,\n'
+        'maria,0671234567;12345,\n'
+        'olena,0931234567,\n',
+        encoding='utf-8',
+    )
+    book = AddressBook()
+    report = import_contacts(book, str(path))
+
+    assert sorted(book.data) == ['Ivan', 'Olena']
+    assert report.imported == 2
+    assert report.rejected == 2
+    assert [(row, field) for row, field, _ in report.errors.errors] == [(3, 'phone'), (4, 'phone')]
@@ -1,8 +1,17 @@
 from collections import UserDict
-from Record import Record
+from .Record import Record
 import pickle
 import re
-from decorators import input_error
+from .decorators import input_error, notify
+
+
+# pickle-файли, збережені до перетворення bot_poetry на пакет,
+# посилаються на модулі верхнього рівня Record і Field
+class BookUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module in ("Record", "Field"):
+            module = f"{__package__}.{module}"
+        return super().find_class(module, name)
 
 
 class AddressBook(UserDict):
@@ -10,7 +19,7 @@ class AddressBook(UserDict):
     @input_error
     def add_record(self, record: Record):
         self.data[record.name.get_value] = record
-        print(f"Сontact {record.name.get_value} has been added to the records")
+        notify(f"Сontact {record.name.get_value} has been added to the records")
 
     # знаходить за ім'ям.
     @input_error
@@ -18,7 +27,7 @@ class AddressBook(UserDict):
         if name in self.data.keys():
             return self.data[name]
         else:
-            print(f"{name} not found")
+            notify(f"{name} not found")
             return None
 
     # видаляє запис за ім'ям.
@@ -26,9 +35,9 @@ class AddressBook(UserDict):
     def delete(self, name):
         if name in self.data.keys():
             del self.data[name]
-            print(f"{name} is delete")
+            notify(f"{name} is delete")
         else:
-            print(f"{name} not found")
+            notify(f"{name} not found")
 
     # повертає генератор за записами;
     # якщо кількість контактів запиту більша за кількість контактів в словнику -> всі контакти;
@@ -56,19 +65,19 @@ class AddressBook(UserDict):
     def to_pickle(self, file_name="backup_address_book"):
         with open(f"{file_name}.pkl", "wb") as file:
             pickle.dump(self.data, file)
-        print(f"Address book saved to {file_name}.pkl")
+        notify(f"Address book saved to {file_name}.pkl")
 
     # десеріалізація даних адресної книги
     @input_error
     def from_pickle(self, filename="backup_address_book"):
         try:
             with open(f"{filename}.pkl", "rb") as file:
-                data = pickle.load(file)
+                data = BookUnpickler(file).load()
                 self.data.update(data)
-            print(f"Address book loaded from {filename}")
+            notify(f"Address book loaded from {filename}")
 
         except FileNotFoundError:
-            print(f"File {filename} not found. Creating a new address book.")
+            notify(f"File {filename} not found. Creating a new address book.")
 
     # пошук одного або кількох користувачів
     # за кількома цифрами номера телефону або літерами імені
@@ -81,4 +90,4 @@ class AddressBook(UserDict):
         if len(find_dict) > 0:
             return find_dict
         else:
-            print(f"{find_str} not found")
+            notify(f"{find_str} not found")
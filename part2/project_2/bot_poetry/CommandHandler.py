@@ -1,9 +1,9 @@
-from AddressBook import AddressBook
-from Table import BookTable, HelpTable
-from Record import Record
+from .AddressBook import AddressBook
+from .Table import BookTable, HelpTable
+from .Record import Record
 from abc import ABC, abstractmethod, ABCMeta
 from rich.console import Console
-from decorators import input_error
+from .decorators import input_error
 
 
 handlers_dict = {}  # Глобальний словник для HandlerFactory
@@ -1,5 +1,13 @@
 from datetime import datetime
 from abc import ABC, abstractmethod
+from .decorators import notify
+
+
+# помилка валідації поля; field - назва поля для звіту пакетного імпорту
+class FieldError(ValueError):
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
 
 
 class Field(ABC):
@@ -22,8 +30,8 @@ class Name(Field):
         if len(value) > 0:
             self.__name = value.capitalize()
         else:
-            print(f"Name {value} isn't correct.")
-            raise ValueError
+            notify(f"Name {value} isn't correct.")
+            raise FieldError("name", f"Name {value} isn't correct")
 
     def __str__(self):
         return f"{self.get_value}"
@@ -43,8 +51,8 @@ class Phone(Field):
         if len(value) == 10 and value.isdigit():
             self.__phone = value
         else:
-            print((f"Phone {value} isn't valid"))
-            raise ValueError
+            notify(f"Phone {value} isn't valid")
+            raise FieldError("phone", f"Phone {value} isn't valid")
 
     def __str__(self):
         return f"{self.get_value}"
@@ -66,10 +74,13 @@ class Birthday(Field):
             and all(part.isdigit() for part in value.split("."))
             and len(value.split(".")[0]) == 4
         ):
-            self.__birthday = datetime.strptime(value, "%Y.%m.%d").date()
+            try:
+                self.__birthday = datetime.strptime(value, "%Y.%m.%d").date()
+            except ValueError as error:
+                raise FieldError("birthday", str(error)) from error
         else:
-            print("Date format isn't valid, should be: year.month.day")
-            raise ValueError
+            notify("Date format isn't valid, should be: year.month.day")
+            raise FieldError("birthday", f"Date {value} isn't valid, should be: year.month.day")
 
     def __str__(self):
         return f"{self.get_value}"
@@ -1,6 +1,6 @@
-from Field import Name, Phone, Birthday
+from .Field import Name, Phone, Birthday
 from datetime import date
-from decorators import input_error
+from .decorators import input_error, notify
 
 
 class Record:
@@ -34,7 +34,7 @@ class Record:
     @input_error
     def add_birthday(self, input_date: str):
         self.birthdays = Birthday(input_date)
-        print(f"Birthday of {self.name} is already added.")
+        notify(f"Birthday of {self.name} is already added.")
 
     # метод додавання телефону
     @input_error
@@ -42,7 +42,7 @@ class Record:
         phone = Phone(input_phone)
         if phone.get_value not in [p.get_value for p in self.phones]:
             self.phones.append(phone)
-            print(f"{phone} successfully added.")
+            notify(f"{phone} successfully added.")
         else:
             return f"{phone} is already exists."
 
@@ -53,9 +53,9 @@ class Record:
             self.phones.remove(
                 self.phones[[p.get_value for p in self.phones].index(phone)]
             )
-            print(f"{phone} successfully removed")
+            notify(f"{phone} successfully removed")
         else:
-            print(f"{phone} not found in the list of phones.")
+            notify(f"{phone} not found in the list of phones.")
 
     # редагує номер
     @input_error
@@ -65,15 +65,15 @@ class Record:
             position = [p.get_value for p in self.phones].index(old_phone)
             self.phones.remove(self.phones[position])
             self.phones.insert(position, phone)
-            print(f"{phone} successfully adited.")
+            notify(f"{phone} successfully adited.")
         else:
-            print(f"{phone} not found in the list of phones.")
+            notify(f"{phone} not found in the list of phones.")
 
     # пошук номеру телефону
     @input_error
     def find_phone(self, phone):
         phone = Phone(phone)
         if phone.value in [p.get_value for p in self.phones]:
-            print(f"{self.name.get_value}: {phone}")
+            notify(f"{self.name.get_value}: {phone}")
         else:
-            print(f"{phone} not in {self.name.get_value} contacts")
+            notify(f"{phone} not in {self.name.get_value} contacts")
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from .AddressBook import AddressBook
+from .Record import Record
+from .decorators import quiet
+
+
+# контакт як словник для сервісів і пакетних задач
+def contact_dict(record: Record):
+    return {
+        "name": record.name.get_value,
+        "phones": [phone.get_value for phone in record.phones],
+        "birthday": record.birthdays.get_value.strftime("%Y.%m.%d") if record.birthdays else None,
+    }
+
+
+# файл книги існує, але не читається; сервіс не створюється, щоб не перезаписати файл порожньою книгою
+class BookLoadError(Exception):
+    pass
+
+
+# адресна книга без input() і виводу в консоль: методи повертають дані,
+# а невалідні значення піднімають ValueError, відсутній контакт - KeyError;
+# книга зберігається в {file_name}.pkl методом save() (або після кожної зміни, якщо autosave)
+class AddressBookService:
+    def __init__(self, file_name="backup_address_book", autosave=False):
+        self.file_name = file_name
+        self.autosave = autosave
+        self.lock = threading.RLock()  # один екземпляр можуть викликати кілька потоків
+        self.book = AddressBook()
+        self.changed = False
+        try:
+            with quiet() as report:
+                self.book.from_pickle(file_name)
+        except Exception as error:
+            raise BookLoadError(f"Address book {file_name}.pkl can't be loaded: {error!r}") from error
+        if report.errors:
+            messages = "; ".join(message for _, _, message in report)
+            raise BookLoadError(f"Address book {file_name}.pkl can't be loaded: {messages}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.save()
+
+    # викликає метод книги чи запису в тихому режимі; помилку зі звіту піднімає як ValueError
+    @staticmethod
+    def call(method, *args):
+        with quiet() as report:
+            result = method(*args)
+        if report.errors:
+            raise ValueError("; ".join(message for _, _, message in report))
+        return result
+
+    def record(self, name: str):
+        record = self.book.data.get(name.capitalize())
+        if record is None:
+            raise KeyError(name)
+        return record
+
+    def mark_changed(self):
+        self.changed = True
+        if self.autosave:
+            self.save()
+
+    # зберігає книгу, якщо після останнього збереження були зміни
+    def save(self):
+        with self.lock:
+            if self.changed:
+                self.call(self.book.to_pickle, self.file_name)
+                self.changed = False
+
+    # створює контакт; контакт з тим самим ім'ям замінюється, як у команді create
+    def add_contact(self, name: str, phones=(), birthday=None):
+        record = Record(name.lower())
+        for phone in phones:
+            self.call(record.add_phone, phone)
+        if birthday:
+            self.call(record.add_birthday, birthday)
+        with self.lock:
+            self.call(self.book.add_record, record)
+            self.mark_changed()
+        return contact_dict(record)
+
+    def add_phone(self, name: str, phone: str):
+        with self.lock:
+            record = self.record(name)
+            self.call(record.add_phone, phone)
+            self.mark_changed()
+            return contact_dict(record)
+
+    def remove_phone(self, name: str, phone: str):
+        with self.lock:
+            record = self.record(name)
+            self.call(record.remove_phone, phone)
+            self.mark_changed()
+            return contact_dict(record)
+
+    def add_birthday(self, name: str, birthday: str):
+        with self.lock:
+            record = self.record(name)
+            self.call(record.add_birthday, birthday)
+            self.mark_changed()
+            return contact_dict(record)
+
+    def delete(self, name: str):
+        with self.lock:
+            self.record(name)
+            self.call(self.book.delete, name.capitalize())
+            self.mark_changed()
+
+    def get(self, name: str):
+        with self.lock:
+            return contact_dict(self.record(name))
+
+    # пошук за частиною імені (регулярний вираз, як у команді find);
+    # невалідний регулярний вираз піднімається як ValueError
+    def find(self, query: str):
+        with self.lock:
+            try:
+                found = self.call(self.book.find_to_show, query.lower()) or {}
+            except re.error as error:
+                raise ValueError(f"Invalid pattern {query}: {error}") from error
+            return [contact_dict(record) for record in found.values()]
+
+    def contacts(self):
+        with self.lock:
+            return [contact_dict(record) for record in self.book.data.values()]
+
+
+# асинхронна обгортка: кожен виклик виконується в потоці через asyncio.to_thread,
+# щоб читання і запис pickle-файлу не блокували цикл подій
+class AsyncAddressBookService:
+    def __init__(self, service: AddressBookService):
+        self.service = service
+
+    @classmethod
+    async def open(cls, file_name="backup_address_book", autosave=False):
+        return cls(await asyncio.to_thread(AddressBookService, file_name, autosave))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.save()
+
+    async def save(self):
+        await asyncio.to_thread(self.service.save)
+
+    async def add_contact(self, name: str, phones=(), birthday=None):
+        return await asyncio.to_thread(self.service.add_contact, name, phones, birthday)
+
+    async def add_phone(self, name: str, phone: str):
+        return await asyncio.to_thread(self.service.add_phone, name, phone)
+
+    async def remove_phone(self, name: str, phone: str):
+        return await asyncio.to_thread(self.service.remove_phone, name, phone)
+
+    async def add_birthday(self, name: str, birthday: str):
+        return await asyncio.to_thread(self.service.add_birthday, name, birthday)
+
+    async def delete(self, name: str):
+        return await asyncio.to_thread(self.service.delete, name)
+
+    async def get(self, name: str):
+        return await asyncio.to_thread(self.service.get, name)
+
+    async def find(self, query: str):
+        return await asyncio.to_thread(self.service.find, query)
+
+    async def contacts(self):
+        return await asyncio.to_thread(self.service.contacts)
+
+
+# методи AddressBookService, доступні в пакетному файлі
+OPERATIONS = ("add_contact", "add_phone", "remove_phone", "add_birthday", "delete", "get", "find", "contacts")
+
+
+# підсумок пакетного запуску: кількість операцій, помилки (рядок, повідомлення) і швидкість
+class BatchReport:
+    def __init__(self):
+        self.operations = 0
+        self.errors = []
+        self.elapsed = 0
+
+    @property
+    def throughput(self):
+        return self.operations / self.elapsed if self.elapsed else 0
+
+    def __str__(self):
+        lines = [
+            f"{self.operations} operations, {len(self.errors)} failed",
+            f"{self.elapsed:.2f} s, {self.throughput:.0f} operations/s",
+        ]
+        lines.extend(f"  line {line}: {message}" for line, message in self.errors[:20])
+        return "\n".join(lines)
+
+
+# виконує операції з JSON-рядків {"op": "add_contact", "name": ..., ...};
+# op - назва методу AddressBookService, решта ключів - його аргументи
+def run_batch(service: AddressBookService, lines):
+    report = BatchReport()
+    started = time.perf_counter()
+    try:
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            report.operations += 1
+            try:
+                arguments = json.loads(line)
+                operation = arguments.pop("op")
+                if operation not in OPERATIONS:
+                    raise ValueError(f"Unknown operation {operation}")
+                getattr(service, operation)(**arguments)
+            except (ValueError, KeyError, TypeError, AttributeError) as error:
+                report.errors.append((line_number, f"{type(error).__name__}: {error}"))
+    finally:
+        # зміни до непередбаченої помилки теж зберігаються
+        service.save()
+    report.elapsed = time.perf_counter() - started
+    return report
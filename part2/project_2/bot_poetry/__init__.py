@@ -0,0 +1,17 @@
+from .AddressBook import AddressBook
+from .Record import Record
+from .Service import (
+    AddressBookService,
+    AsyncAddressBookService,
+    BookLoadError,
+    run_batch,
+)
+
+__all__ = [
+    "AddressBook",
+    "Record",
+    "AddressBookService",
+    "AsyncAddressBookService",
+    "BookLoadError",
+    "run_batch",
+]
@@ -1,26 +1,76 @@
+import threading
+from contextlib import contextmanager
 from functools import wraps
 
 
+# помилки, які input_error повертає як значення замість винятку
+HANDLED_ERRORS = (
+    IndexError,
+    ValueError,
+    KeyError,
+    TypeError,
+    AttributeError,
+    ZeroDivisionError,
+    FileNotFoundError,
+    PermissionError,
+)
+
+
+# звіт тихого режиму: помилки валідації (рядок, поле, повідомлення);
+# row виставляє той, хто обробляє пакет, перед обробкою кожного рядка
+class ErrorReport:
+
+    def __init__(self):
+        self.row = None
+        self.errors = []
+
+    def add(self, field, message):
+        self.errors.append((self.row, field, message))
+
+    def __len__(self):
+        return len(self.errors)
+
+    def __iter__(self):
+        return iter(self.errors)
+
+    def __str__(self):
+        return "\n".join(
+            f"row {row}, {field}: {message}" for row, field, message in self.errors
+        )
+
+
+bulk = threading.local()  # bulk.report - ErrorReport тихого режиму в цьому потоці
+
+
+# тихий режим для пакетних операцій: методи нічого не виводять,
+# а помилки, перехоплені input_error, додаються у звіт
+@contextmanager
+def quiet(report=None):
+    report = ErrorReport() if report is None else report
+    previous = getattr(bulk, "report", None)
+    bulk.report = report
+    try:
+        yield report
+    finally:
+        bulk.report = previous
+
+
+# print, що мовчить у тихому режимі
+def notify(*args):
+    if getattr(bulk, "report", None) is None:
+        print(*args)
+
+
+# повертає помилку як значення, а в тихому режимі записує її у звіт і повертає None
 def input_error(func):
     @wraps(func)
-    def wrapper(*args):
+    def wrapper(*args, **kwargs):
         try:
-            return func(*args)
-        except IndexError as index_ex_message:
-            return index_ex_message
-        except ValueError as val_ex_message:
-            return val_ex_message
-        except KeyError as key_ex_message:
-            return key_ex_message
-        except TypeError as type_ex_message:
-            return type_ex_message
-        except AttributeError as atr_ex_message:
-            return atr_ex_message
-        except ZeroDivisionError as zero_div_ex_message:
-            return zero_div_ex_message
-        except FileNotFoundError as file_not_found_ex_message:
-            return file_not_found_ex_message
-        except PermissionError as permission_ex_message:
-            return permission_ex_message
+            return func(*args, **kwargs)
+        except HANDLED_ERRORS as error:
+            report = getattr(bulk, "report", None)
+            if report is None:
+                return error
+            report.add(getattr(error, "field", func.__name__), str(error))
 
     return wrapper
@@ -1,7 +1,6 @@
-from CommandHandler import handlers_dict
-from prompt_toolkit import prompt
-from prompt_toolkit.completion import WordCompleter
-from art import *
+import argparse
+import sys
+from .CommandHandler import handlers_dict
 
 
 class HandlerFactory:
@@ -14,7 +13,12 @@ class HandlerFactory:
             return None
 
 
-if __name__ == "__main__":
+# інтерактивний асистент: консольна команда bot-poetry
+def main():
+    from prompt_toolkit import prompt
+    from prompt_toolkit.completion import WordCompleter
+    from art import tprint
+
     tprint("Personal    assistant")
 
     word_completer = WordCompleter(handlers_dict.keys())
@@ -30,3 +34,31 @@ if __name__ == "__main__":
 
         if command == "exit":
             break
+
+
+# пакетний режим без TTY: консольна команда bot-poetry-batch,
+# операції - JSON-рядки з файлу або stdin (див. Service.run_batch)
+def batch():
+    from .Service import AddressBookService, BookLoadError, run_batch
+
+    parser = argparse.ArgumentParser(description="Apply address book operations from JSON lines")
+    parser.add_argument("operations", nargs="?", default="-", help="file with operations, - for stdin")
+    parser.add_argument("--book", default="backup_address_book", help="address book file without .pkl")
+    arguments = parser.parse_args()
+
+    try:
+        service = AddressBookService(arguments.book)
+    except BookLoadError as error:
+        print(error)
+        return 2
+    if arguments.operations == "-":
+        report = run_batch(service, sys.stdin)
+    else:
+        with open(arguments.operations, encoding="utf-8") as file:
+            report = run_batch(service, file)
+    print(report)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    main()
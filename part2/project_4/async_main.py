@@ -0,0 +1,198 @@
+import asyncio
+import http.client
+import io
+import mimetypes
+import socket
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+
+from main import (
+    BODY_LIMIT,
+    KEEP_ALIVE_TIMEOUT,
+    SOCKET_ADDRESS,
+    SOCKET_BATCH,
+    SOCKET_BUFFER,
+    file_cache,
+    file_response,
+    message_store,
+    parse_form,
+    parse_message,
+    send_message,
+    static_path,
+    wants_gzip,
+)
+
+
+HEADERS_LIMIT = 64 * 1024
+
+
+class MessageProtocol(asyncio.DatagramProtocol):
+    """UDP endpoint of the asyncio server.
+
+    Datagrams received during one event loop iteration are handed to the message
+    store as one batch. The store runs on a single writer thread, so disk writes
+    and compaction never block the event loop.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.batch = []
+        self.loop = asyncio.get_running_loop()
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix='message-store')
+        self.timer = None
+
+    def connection_made(self, transport):
+        self.writer.submit(self.store.open)
+        self.timer = self.loop.call_later(self.store.compact_interval, self.compact_if_due)
+
+    def datagram_received(self, data, addr):
+        message = parse_message(data)
+        if message is None:
+            return
+        if not self.batch:
+            self.loop.call_soon(self.flush)
+        self.batch.append(message)
+        if len(self.batch) >= SOCKET_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            batch, self.batch = self.batch, []
+            self.writer.submit(self.store.append, batch)
+
+    def compact_if_due(self):
+        self.writer.submit(self.store.compact_if_due)
+        self.timer = self.loop.call_later(self.store.compact_interval, self.compact_if_due)
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        self.flush()
+        self.writer.submit(self.store.close)
+        self.writer.shutdown(wait=True)
+
+
+def response_head(status, headers, keep_alive):
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}', f'Date: {formatdate(usegmt=True)}']
+    lines.extend(f'{name}: {value}' for name, value in headers.items())
+    lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def send_empty(writer, status, keep_alive, headers=None):
+    writer.write(response_head(status, {**(headers or {}), 'Content-Length': 0}, keep_alive))
+
+
+async def send_file(writer, method, headers, path, content_type, keep_alive, status=HTTPStatus.OK):
+    if file_cache.is_warm(path, status == HTTPStatus.OK and wants_gzip(content_type, headers)):
+        response = file_response(path, content_type, headers, status)
+    else:
+        # a cache miss opens, reads and maybe compresses the file: keep it off the event loop
+        response = await asyncio.to_thread(file_response, path, content_type, headers, status)
+    status, head, entry, span = response
+    writer.write(response_head(HTTPStatus(status), head, keep_alive))
+    if method == 'HEAD' or span is None:
+        return
+    offset, length = span
+    if entry.body is not None:
+        writer.write(memoryview(entry.body)[offset:offset + length])
+    elif length:
+        await writer.drain()
+        with open(entry.path, 'rb') as file:
+            await asyncio.get_running_loop().sendfile(writer.transport, file, offset, length)
+
+
+async def respond(writer, method, target, headers, body, keep_alive):
+    path = urllib.parse.urlsplit(target).path
+    if method in ('GET', 'HEAD'):
+        if path == '/':
+            await send_file(writer, method, headers, 'index.html', 'text/html', keep_alive)
+        elif path == '/message':
+            await send_file(writer, method, headers, 'message.html', 'text/html', keep_alive)
+        else:
+            file = static_path(path)
+            if file:
+                content_type = mimetypes.guess_type(file)[0] or 'text/plain'
+                await send_file(writer, method, headers, file, content_type, keep_alive)
+            else:
+                await send_file(writer, method, headers, 'error.html', 'text/html', keep_alive, HTTPStatus.NOT_FOUND)
+    elif method == 'POST' and not body:
+        send_empty(writer, HTTPStatus.BAD_REQUEST, keep_alive)
+    elif method == 'POST':
+        try:
+            send_message(parse_form(body.decode('utf-8')))
+        except OSError:
+            send_empty(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, keep_alive)
+        except ValueError:
+            send_empty(writer, HTTPStatus.BAD_REQUEST, keep_alive)
+        else:
+            send_empty(writer, HTTPStatus.SEE_OTHER, keep_alive, {'Location': '/message'})
+    else:
+        send_empty(writer, HTTPStatus.NOT_IMPLEMENTED, keep_alive)
+    await writer.drain()
+
+
+def wants_keep_alive(version, headers):
+    connection = headers.get('Connection', '').lower()
+    if version == 'HTTP/1.1':
+        return connection != 'close'
+    return connection == 'keep-alive'
+
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                return
+            request_line, _, header_bytes = head.partition(b'\r\n')
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+                headers = http.client.parse_headers(io.BytesIO(header_bytes))
+                content_length = int(headers.get('Content-Length', 0))
+            except (ValueError, http.client.HTTPException):
+                send_empty(writer, HTTPStatus.BAD_REQUEST, False)
+                await writer.drain()
+                return
+            if content_length < 0 or content_length > BODY_LIMIT:
+                # the body is not read, so the connection cannot be reused
+                status = HTTPStatus.BAD_REQUEST if content_length < 0 else HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                send_empty(writer, status, False)
+                await writer.drain()
+                return
+            body = await reader.readexactly(content_length) if content_length else b''
+            keep_alive = wants_keep_alive(version, headers)
+            await respond(writer, method, target, headers, body, keep_alive)
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def main():
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+    sock.bind(SOCKET_ADDRESS)
+    transport, protocol = await loop.create_datagram_endpoint(lambda: MessageProtocol(message_store), sock=sock)
+    print("Socket server is running at port 5000...")
+    server = await asyncio.start_server(handle_connection, '', 3000, limit=HEADERS_LIMIT, backlog=1024)
+    print("HTTP server is running at port 3000...")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        transport.close()
+        protocol.close()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+
+SERVERS = {'threaded': 'main.py', 'asyncio': 'async_main.py'}
+POST_BODY = b'username=load&message=test'
+
+
+def request_bytes(path, post, gzip):
+    encoding = 'Accept-Encoding: gzip\r\n' if gzip else ''
+    if post:
+        return (
+            f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/x-www-form-urlencoded\r\n'
+            f'Content-Length: {len(POST_BODY)}\r\n\r\n'
+        ).encode('latin-1') + POST_BODY
+    return f'GET {path} HTTP/1.1\r\nHost: localhost\r\n{encoding}\r\n'.encode('latin-1')
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    will_close = head.startswith(b'HTTP/1.0')
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        name = name.strip().lower()
+        if name == b'content-length':
+            length = int(value)
+        elif name == b'connection':
+            will_close = value.strip().lower() == b'close'
+    await reader.readexactly(length)
+    return status, will_close, len(head) + length
+
+
+async def client(port, request, deadline, latencies, errors, transferred):
+    writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('localhost', port)
+            start = time.perf_counter()
+            writer.write(request)
+            status, will_close, size = await asyncio.wait_for(read_response(reader), 10)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as error:
+            errors.append(error)
+            if writer is not None:
+                writer.close()
+                writer = None
+            await asyncio.sleep(0.01)
+            continue
+        latencies.append(time.perf_counter() - start)
+        transferred.append(size)
+        if status >= 400:
+            errors.append(status)
+        if will_close:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, path, connections, duration, post, gzip):
+    latencies = []
+    errors = []
+    transferred = []
+    request = request_bytes(path, post, gzip)
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(client(port, request, deadline, latencies, errors, transferred) for _ in range(connections))
+    )
+    return latencies, errors, transferred, time.perf_counter() - started
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('localhost', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not start on port {port}')
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the threaded and the asyncio server under keep-alive load')
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=list(SERVERS))
+    parser.add_argument('--paths', nargs='+', default=['/', '/message', '/style.css', '/logo.png'])
+    parser.add_argument('--connections', nargs='+', type=int, default=[16, 1000])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--post', action='store_true', help='submit the message form instead of GET')
+    parser.add_argument('--gzip', action='store_true', help='send Accept-Encoding: gzip')
+    parser.add_argument('--port', type=int, default=3000)
+    args = parser.parse_args()
+
+    print(f'{"server":<9} {"path":<16} {"conns":>6} {"bytes":>6} {"req/s":>9} {"p50, ms":>8} {"p99, ms":>8} {"errors":>7}')
+    for name in args.servers:
+        server = subprocess.Popen([sys.executable, SERVERS[name]], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port)
+            for path in args.paths:
+                for connections in args.connections:
+                    latencies, errors, transferred, elapsed = asyncio.run(
+                        load(args.port, path, connections, args.duration, args.post, args.gzip)
+                    )
+                    latencies.sort()
+                    print(
+                        f'{name:<9} {path:<16} {connections:>6} '
+                        f'{sum(transferred) // max(len(transferred), 1):>6} {len(latencies) / elapsed:>9.0f} '
+                        f'{percentile(latencies, 0.5) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f} '
+                        f'{len(errors):>7}'
+                    )
+        finally:
+            server.terminate()
+            server.wait()
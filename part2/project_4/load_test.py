@@ -0,0 +1,107 @@
+import argparse
+import http.client
+import socket
+import threading
+import time
+import urllib.parse
+
+
+POST_BODY = 'username=load&message=test'
+POST_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+
+def worker(url, deadline, keep_alive, latencies, errors, conditional, post):
+    parts = urllib.parse.urlsplit(url)
+    connection = None
+    headers = {}
+    etag = None
+    while time.perf_counter() < deadline:
+        if connection is None:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+        if conditional and etag:
+            headers = {'If-None-Match': etag}
+        start = time.perf_counter()
+        try:
+            if post:
+                connection.request('POST', parts.path or '/', body=POST_BODY, headers=POST_HEADERS)
+            else:
+                connection.request('GET', parts.path or '/', headers=headers)
+            response = connection.getresponse()
+            response.read()
+            etag = response.getheader('ETag')
+            if response.status >= 400:
+                errors.append(response.status)
+            if not keep_alive or response.will_close:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(error)
+            connection.close()
+            connection = None
+            continue
+        latencies.append(time.perf_counter() - start)
+    if connection is not None:
+        connection.close()
+
+
+def open_idle(url, count, keep_alive):
+    # with keep_alive: connections that finished one request and stay open, like a browser's;
+    # otherwise: connections stuck in the middle of their request line
+    parts = urllib.parse.urlsplit(url)
+    connections = []
+    for _ in range(count):
+        if keep_alive:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+            connection.request('GET', parts.path or '/')
+            connection.getresponse().read()
+        else:
+            connection = socket.create_connection((parts.hostname, parts.port or 80))
+            connection.sendall(b'GET / HTTP/1.1\r\n')
+        connections.append(connection)
+    return connections
+
+
+def run(url, concurrency, duration, keep_alive, conditional, post=False):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(url, deadline, keep_alive, latencies, errors, conditional, post))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test for the HTTP server: requests/sec and latency')
+    parser.add_argument('urls', nargs='*', default=['http://localhost:3000/', 'http://localhost:3000/style.css'])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--keep-alive', action='store_true', help='reuse connections if the server allows it')
+    parser.add_argument('--conditional', action='store_true', help='send If-None-Match with the last ETag')
+    parser.add_argument('--post', action='store_true', help='submit the message form instead of GET')
+    parser.add_argument('--idle', type=int, default=0, help='hold N connections that never finish their request')
+    args = parser.parse_args()
+
+    idle = open_idle(args.urls[0], args.idle, args.keep_alive)
+
+    print(f'{"url":<40} {"req/s":>9} {"p50, ms":>8} {"p99, ms":>8} {"errors":>7}')
+    for url in args.urls:
+        latencies, errors, elapsed = run(url, args.concurrency, args.duration, args.keep_alive, args.conditional, args.post)
+        latencies.sort()
+        print(
+            f'{url:<40} {len(latencies) / elapsed:>9.0f} {percentile(latencies, 0.5) * 1000:>8.2f} '
+            f'{percentile(latencies, 0.99) * 1000:>8.2f} {len(errors):>7}'
+        )
+    for connection in idle:
+        connection.close()
@@ -1,15 +1,312 @@
+import gzip
+import itertools
 import json
-import socketserver
+import os
 import socket
-from http.server import BaseHTTPRequestHandler
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
 import urllib.parse
 import pathlib
 import mimetypes
 from datetime import datetime
 import threading
+import queue
+import select
+import selectors
+import time
+
+
+HTTP_WORKERS = 32
+CACHE_LIMIT = 64 * 1024
+SOCKET_ADDRESS = ('localhost', 5000)
+SOCKET_BATCH = 500
+SOCKET_BUFFER = 4 * 1024 * 1024
+DATAGRAM_SIZE = 65535
+BODY_LIMIT = DATAGRAM_SIZE  # a larger form never fits into one message datagram
+COMPACT_EVERY = 1000
+COMPACT_INTERVAL = 30
+KEEP_ALIVE_TIMEOUT = 15
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class StaticFile:
+    def __init__(self, path, stat, body=None, encoding=None):
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size if body is None else len(body)
+        suffix = f'-{encoding}' if encoding else ''
+        self.etag = f'"{stat.st_mtime_ns:x}-{self.size:x}{suffix}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.body = body
+        self.encoding = encoding
+        self.gzip = None
+
+
+class FileCache:
+    """Metadata of served files plus the bodies of files up to `limit` bytes.
+
+    Every lookup stats the file, so an entry is replaced as soon as the file's
+    mtime or size changes; larger files are streamed with sendfile instead.
+    The gzip variant of an entry is made on first request: a `.gz` sibling that
+    is not older than the file, otherwise the cached body compressed in memory.
+    """
+
+    def __init__(self, limit=CACHE_LIMIT):
+        self.limit = limit
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        entry = self.files.get(path)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            return entry
+        body = None
+        if stat.st_size <= self.limit:
+            with open(path, 'rb') as file:
+                body = file.read()
+            if len(body) != stat.st_size:
+                return StaticFile(path, stat, None)
+        entry = StaticFile(path, stat, body)
+        with self.lock:
+            self.files[path] = entry
+        return entry
+
+    def is_warm(self, path, wants_gzip):
+        """True when a lookup of `path` needs nothing but a stat: the entry is cached
+        and unchanged and, if `wants_gzip`, its gzip variant is already decided."""
+        entry = self.files.get(path)
+        if entry is None or (wants_gzip and entry.gzip is None):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size
+
+    def compressed(self, entry):
+        if entry.gzip is None:
+            entry.gzip = self.load_gzip(entry) or False
+        return entry.gzip
+
+    def load_gzip(self, entry):
+        try:
+            stat = os.stat(entry.path + '.gz')
+        except OSError:
+            stat = None
+        if stat is not None and stat.st_mtime_ns >= entry.mtime_ns:
+            body = None
+            if stat.st_size <= self.limit:
+                with open(entry.path + '.gz', 'rb') as file:
+                    body = file.read()
+            return StaticFile(entry.path + '.gz', stat, body, 'gzip')
+        if entry.body is None:
+            return None
+        body = gzip.compress(entry.body, 9, mtime=0)
+        if len(body) >= entry.size:
+            return None
+        return StaticFile(entry.path, os.stat(entry.path), body, 'gzip')
+
+
+file_cache = FileCache()
+
+
+class MessageStore:
+    """Append-only message journal compacted into `data.json`.
+
+    Only the socket server thread writes to it. `append` adds a batch of messages
+    to `data.jsonl`; every `compact_every` messages or `compact_interval` seconds
+    the journal is merged into `data.json`, so the cost of storing a message does
+    not grow with the number of stored messages.
+    """
+
+    def __init__(self, path='storage/data.json', compact_every=COMPACT_EVERY, compact_interval=COMPACT_INTERVAL):
+        self.path = pathlib.Path(path)
+        self.journal_path = self.path.with_suffix('.jsonl')
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self.journal = None
+        self.appended = 0
+        self.compacted_at = time.monotonic()
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        self.compact()
+
+    def close(self):
+        if self.journal is not None:
+            self.compact()
+            self.journal.close()
+            self.journal = None
+
+    def append(self, messages):
+        self.journal.writelines(json.dumps(message) + '\n' for message in messages)
+        self.journal.flush()
+        self.appended += len(messages)
+        if self.appended >= self.compact_every:
+            self.compact()
+
+    def compact_if_due(self):
+        if self.appended and time.monotonic() - self.compacted_at >= self.compact_interval:
+            self.compact()
+
+    def compact(self):
+        self.appended = 0
+        self.compacted_at = time.monotonic()
+        if os.path.getsize(self.journal_path) == 0:
+            return
+        try:
+            with open(self.path, 'r') as json_file:
+                file_data = json.load(json_file)
+        except FileNotFoundError:
+            file_data = {}
+        with open(self.journal_path, 'r', encoding='utf-8') as journal_file:
+            for line in journal_file:
+                try:
+                    file_data.update(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as json_file:
+            json.dump(file_data, json_file, indent=2)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(tmp_path, self.path)
+        self.journal.truncate(0)
+
+
+message_store = MessageStore()
+message_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+message_numbers = itertools.count()
+
+
+def static_path(url_path):
+    root = pathlib.Path.cwd()
+    try:
+        path = root.joinpath(urllib.parse.unquote(url_path[1:])).resolve()
+        if path.is_relative_to(root) and path.is_file():
+            return str(path.relative_to(root))
+    except (ValueError, OSError):
+        # an embedded NUL (%00) or a name too long for the filesystem is simply not found
+        pass
+    return None
+
+
+def not_modified(entry, headers):
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or entry.etag in tags
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return entry.mtime_ns // 1_000_000_000 <= since
+    return False
+
+
+def accepts_gzip(headers):
+    for coding in headers.get('Accept-Encoding', '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', 'x-gzip', '*'):
+            quality = params.replace(' ', '').removeprefix('q=')
+            try:
+                return not params or float(quality) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def byte_range(entry, headers):
+    range_header = headers.get('Range', '')
+    if not range_header.startswith('bytes=') or ',' in range_header:
+        return None
+    if_range = headers.get('If-Range')
+    if if_range and if_range not in (entry.etag, entry.last_modified):
+        return None
+    start, _, end = range_header.removeprefix('bytes=').strip().partition('-')
+    if start.isdigit() and (end.isdigit() or not end):
+        start, end = int(start), min(int(end or entry.size - 1), entry.size - 1)
+        return (start, end) if start <= end or start >= entry.size else None
+    if not start and end.isdigit():
+        return max(entry.size - int(end), 0), entry.size - 1
+    return None
+
+
+def wants_gzip(content_type, headers):
+    return content_type.startswith(COMPRESSIBLE) and 'Range' not in headers and accepts_gzip(headers)
+
+
+def file_response(path, content_type, headers, status=200):
+    """Status, headers, the entry to send (the file or its gzip variant) and its
+    (offset, length) span to send, or None when the response has no body."""
+    entry = file_cache.get(path)
+    head = {'Content-type': content_type}
+    compressible = content_type.startswith(COMPRESSIBLE)
+    if compressible:
+        head['Vary'] = 'Accept-Encoding'
+    if status != 200:
+        head['Content-Length'] = entry.size
+        return status, head, entry, (0, entry.size)
+    if wants_gzip(content_type, headers):
+        entry = file_cache.compressed(entry) or entry
+    head['ETag'] = entry.etag
+    head['Last-Modified'] = entry.last_modified
+    if entry.encoding:
+        head['Content-Encoding'] = entry.encoding
+    else:
+        head['Accept-Ranges'] = 'bytes'
+    if not_modified(entry, headers):
+        del head['Content-type']
+        return 304, head, entry, None
+    span = None if entry.encoding else byte_range(entry, headers)
+    if span is None:
+        head['Content-Length'] = entry.size
+        return 200, head, entry, (0, entry.size)
+    start, end = span
+    if start >= entry.size:
+        head['Content-Range'] = f'bytes */{entry.size}'
+        head['Content-Length'] = 0
+        return 416, head, entry, None
+    head['Content-Range'] = f'bytes {start}-{end}/{entry.size}'
+    head['Content-Length'] = end - start + 1
+    return 206, head, entry, (start, end - start + 1)
+
+
+def parse_form(post_data):
+    pairs = post_data.split('&')
+    data = {}
+    for pair in pairs:
+        key, value = pair.split('=')
+        data[key] = value
+    return data
 
 
 class HttpHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        # only requests that have already arrived are served on this worker; an idle
+        # keep-alive connection goes back to the server's selector
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.pending():
+            self.handle_one_request()
+
+    def pending(self):
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
     def do_GET(self):
         pr_url = urllib.parse.urlparse(self.path)
         if pr_url.path == '/':
@@ -17,74 +314,211 @@ class HttpHandler(BaseHTTPRequestHandler):
         elif pr_url.path == '/message':
             self.send_html_file('message.html')
         else:
-            if pathlib.Path().joinpath(pr_url.path[1:]).exists():
-                self.send_static()
+            path = static_path(pr_url.path)
+            if path:
+                self.send_static(path)
             else:
                 self.send_html_file('error.html', 404)
 
+    def do_HEAD(self):
+        self.do_GET()
+
     def send_html_file(self, filename, status=200):
+        self.send_file(filename, 'text/html', status)
+
+    def send_static(self, path):
+        mt = mimetypes.guess_type(path)
+        self.send_file(path, mt[0] or 'text/plain')
+
+    def send_file(self, path, content_type, status=200):
+        status, head, entry, span = file_response(path, content_type, self.headers, status)
         self.send_response(status)
-        self.send_header('Content-type', 'text/html')
+        for name, value in head.items():
+            self.send_header(name, str(value))
         self.end_headers()
-        with open(filename, 'rb') as fd:
-            self.wfile.write(fd.read())
-
-    def send_static(self):
-        self.send_response(200)
-        mt = mimetypes.guess_type(self.path)
-        if mt:
-            self.send_header("Content-type", mt[0])
-        else:
-            self.send_header("Content-type", 'text/plain')
-        self.end_headers()
-        with open(f'.{self.path}', 'rb') as file:
-            self.wfile.write(file.read())
+        if self.command == 'HEAD' or span is None:
+            return
+        offset, length = span
+        if entry.body is not None:
+            self.wfile.write(memoryview(entry.body)[offset:offset + length])
+        elif length:
+            with open(entry.path, 'rb') as file:
+                self.connection.sendfile(file, offset, length)
 
     def do_POST(self):
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length).decode('utf-8')
-        if post_data:
-            self.send_response(303)
-            self.send_header('Location', '/message')
-            self.end_headers()
+        try:
+            content_length = int(self.headers['Content-Length'])
+            if content_length < 0:
+                raise ValueError(content_length)
+        except (ValueError, TypeError):
+            # the body cannot be skipped without a valid length
+            self.close_connection = True
+            self.send_error(400, 'Bad Content-Length')
+            return
+        if content_length > BODY_LIMIT:
+            self.close_connection = True
+            self.send_error(413, 'Message is too long')
+            return
+        post_data = self.rfile.read(content_length)
+        if not post_data:
+            self.send_error(400, 'Empty message')
+            return
+        try:
+            send_message(parse_form(post_data.decode('utf-8')))
+        except OSError:
+            self.send_error(413, 'Message is too long')
+            return
+        except ValueError:
+            self.send_error(400, 'Malformed message')
+            return
+
+        self.send_response(303)
+        self.send_header('Location', '/message')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
 
 
-            pairs = post_data.split('&')
-            data = {}
-            for pair in pairs:
-                key, value = pair.split('=')
-                data[key] = value
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles connections on a fixed pool of worker threads.
 
-            timestamp = datetime.now().isoformat()
+    A worker gets a connection only when a request is ready on it. Between
+    requests keep-alive connections wait in a selector on the `keep-alive`
+    thread and are closed after `KEEP_ALIVE_TIMEOUT` idle seconds, so idle
+    clients never hold a worker.
+    """
 
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers=HTTP_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.requests = queue.Queue()
+        self.parked = queue.SimpleQueue()
+        self.idle = {}
+        self.selector = selectors.DefaultSelector()
+        self.wakeup, self.wakeup_signal = socket.socketpair()
+        self.selector.register(self.wakeup, selectors.EVENT_READ)
+        self.closing = False
+        self.workers = [
+            threading.Thread(target=self.work, name=f'http-{number}', daemon=True) for number in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+        threading.Thread(target=self.watch_idle, name='keep-alive', daemon=True).start()
+
+    def process_request(self, request, client_address):
+        self.requests.put((request, client_address))
+
+    def work(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+            request, client_address = item
             try:
-                with open('storage/data.json', 'r') as json_file:
-                    file_data = json.load(json_file)
-            except FileNotFoundError:
-                file_data = {}
+                handler = self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+                self.shutdown_request(request)
+                continue
+            if handler.close_connection:
+                self.shutdown_request(request)
+            else:
+                self.park(request, client_address)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
 
-            file_data[timestamp] = data
+    def park(self, request, client_address):
+        self.parked.put((request, client_address))
+        self.wakeup_signal.send(b'\0')
 
-            with open('storage/data.json', 'w') as json_file:
-                json.dump(file_data, json_file, indent=2)
+    def watch_idle(self):
+        swept_at = time.monotonic()
+        while not self.closing:
+            for key, _ in self.selector.select(1):
+                if key.fileobj is self.wakeup:
+                    self.wakeup.recv(4096)
+                    continue
+                self.selector.unregister(key.fileobj)
+                client_address, _ = self.idle.pop(key.fileobj)
+                self.requests.put((key.fileobj, client_address))
+            now = time.monotonic()
+            while not self.parked.empty():
+                request, client_address = self.parked.get()
+                self.idle[request] = (client_address, now + KEEP_ALIVE_TIMEOUT)
+                self.selector.register(request, selectors.EVENT_READ)
+            if now - swept_at >= 1:
+                swept_at = now
+                for request, (_, deadline) in list(self.idle.items()):
+                    if deadline <= now:
+                        self.selector.unregister(request)
+                        del self.idle[request]
+                        self.shutdown_request(request)
+        for request in self.idle:
+            self.shutdown_request(request)
+        self.selector.close()
+
+    def server_close(self):
+        super().server_close()
+        for _ in getattr(self, 'workers', ()):
+            self.requests.put(None)
+        if hasattr(self, 'selector'):
+            self.closing = True
+            self.wakeup_signal.send(b'\0')
 
 
 def run_http_server():
-    with socketserver.TCPServer(("", 3000), HttpHandler) as httpd:
+    with PooledHTTPServer(("", 3000), HttpHandler) as httpd:
         print("HTTP server is running at port 3000...")
         httpd.serve_forever()
 
 
-def handle_socket_data():
+def send_message(data):
+    # the counter keeps keys of messages posted within the same microsecond apart
+    key = f'{datetime.now().isoformat()}-{next(message_numbers)}'
+    message = json.dumps({key: data}).encode('utf-8')
+    message_socket.sendto(message, SOCKET_ADDRESS)
+
+
+def parse_message(datagram):
+    try:
+        message = json.loads(datagram)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if isinstance(message, dict) and all(isinstance(data, dict) for data in message.values()):
+        return message
+    return None
+
+
+def handle_socket_data(store=message_store):
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-        sock.bind(('localhost', 5000))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+        sock.bind(SOCKET_ADDRESS)
+        sock.setblocking(False)
+        store.open()
         print("Socket server is running at port 5000...")
         while True:
-            data, _ = sock.recvfrom(1024)
+            readable, _, _ = select.select([sock], [], [], store.compact_interval)
+            if not readable:
+                store.compact_if_due()
+                continue
+            batch = []
+            while len(batch) < SOCKET_BATCH:
+                try:
+                    datagram = sock.recv(DATAGRAM_SIZE)
+                except BlockingIOError:
+                    break
+                message = parse_message(datagram)
+                if message is not None:
+                    batch.append(message)
+            if batch:
+                store.append(batch)
+            store.compact_if_due()
 
 
-http_thread = threading.Thread(target=run_http_server)
-http_thread.start()
+if __name__ == '__main__':
+    http_thread = threading.Thread(target=run_http_server)
+    http_thread.start()
 
-socket_thread = threading.Thread(target=handle_socket_data)
-socket_thread.start()
+    socket_thread = threading.Thread(target=handle_socket_data)
+    socket_thread.start()
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import pathlib
+import asyncio
+import aiohttp
+from collections import Counter
+from datetime import datetime, timedelta
+
+
+API_URL = os.environ.get('PRIVATBANK_API_URL', 'https://api.privatbank.ua/p24api/exchange_rates')
+CACHE_PATH = pathlib.Path(__file__).with_name('rates.db')
+TODAY_TTL = 3600
+CONCURRENCY = 8
+TIMEOUT = 10
+RETRIES = 4
+BACKOFF = 0.5
+MAX_DAYS = 366  # one request per day, so this also bounds the upstream fan-out of one command
+
+
+class FetchError(Exception):
+    pass
+
+
+def is_fresh(date, fetched_at, today_ttl):
+    # a rate fetched after its day has ended will not change any more
+    final = datetime.fromtimestamp(fetched_at).date() > datetime.strptime(date, '%d.%m.%Y').date()
+    return final or time.time() - fetched_at < today_ttl
+
+
+class MemoryRateCache:
+    """Exchange rates by date in a dict, for long-running servers; same rules as RateCache."""
+
+    def __init__(self, today_ttl=TODAY_TTL):
+        self.today_ttl = today_ttl
+        self.rates = {}
+
+    def close(self):
+        pass
+
+    def get(self, date, stale=False):
+        entry = self.rates.get(date)
+        if entry is None:
+            return None
+        fetched_at, rates = entry
+        if stale or is_fresh(date, fetched_at, self.today_ttl):
+            return rates
+        return None
+
+    def put(self, date, rates):
+        self.rates[date] = (time.time(), rates)
+
+
+class RateCache:
+    """Exchange rates by date in SQLite.
+
+    Rates fetched after their day has ended never change and are kept forever;
+    rates fetched during their own day (today's) expire after `today_ttl` seconds.
+    """
+
+    def __init__(self, path=CACHE_PATH, today_ttl=TODAY_TTL):
+        self.today_ttl = today_ttl
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS rates (date TEXT PRIMARY KEY, fetched_at REAL NOT NULL, rates TEXT NOT NULL)'
+        )
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, date, stale=False):
+        row = self.connection.execute('SELECT fetched_at, rates FROM rates WHERE date = ?', (date,)).fetchone()
+        if row is None:
+            return None
+        fetched_at, rates = row
+        if stale or is_fresh(date, fetched_at, self.today_ttl):
+            return json.loads(rates)
+        return None
+
+    def put(self, date, rates):
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO rates VALUES (?, ?, ?)', (date, time.time(), json.dumps(rates))
+            )
+
+
+class RateFetcher:
+    """PrivatBank exchange rates over one long-lived aiohttp session.
+
+    At most `concurrency` requests are in flight. Each request has `timeout`
+    seconds; timeouts, connection errors, 429 and 5xx answers are retried up to
+    `retries` times after a jittered exponential backoff (random 0..backoff * 2**attempt).
+    The optional `cache` is consulted before the network, and concurrent
+    requests for the same date share one download (single flight); `stats`
+    counts cache hits, misses, coalesced requests and failed downloads.
+    """
+
+    def __init__(self, cache=None, concurrency=CONCURRENCY, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+                 url=API_URL):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.url = url
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.session = None
+        self.flights = {}
+        self.stats = Counter()
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    async def request(self, date):
+        async with self.semaphore:
+            async with self.session.get(f'{self.url}?json&date={date}') as response:
+                if response.status == 429 or response.status >= 500:
+                    raise FetchError(f'HTTP {response.status}')
+                response.raise_for_status()
+                json_data = await response.json()
+                return json_data['exchangeRate']
+
+    async def fetch(self, date):
+        if self.cache is not None:
+            rates = self.cache.get(date)
+            if rates is not None:
+                self.stats['hits'] += 1
+                return rates
+        flight = self.flights.get(date)
+        if flight is None:
+            self.stats['misses'] += 1
+            flight = self.flights[date] = asyncio.ensure_future(self.download(date))
+            flight.add_done_callback(lambda done: self.landed(date, done))
+        else:
+            self.stats['coalesced'] += 1
+        # a client that disconnects must not cancel the download for the others
+        return await asyncio.shield(flight)
+
+    def landed(self, date, flight):
+        del self.flights[date]
+        if not flight.cancelled() and flight.exception() is not None:
+            self.stats['errors'] += 1
+
+    def metrics(self):
+        requests = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+        served = self.stats['hits'] + self.stats['coalesced']
+        return {**self.stats, 'hit_rate': round(served / requests, 3) if requests else 0.0}
+
+    async def download(self, date):
+        for attempt in range(self.retries + 1):
+            try:
+                rates = await self.request(date)
+                break
+            except (FetchError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    stale = self.cache.get(date, stale=True) if self.cache is not None else None
+                    if stale is not None:
+                        return stale
+                    raise FetchError(str(e) or type(e).__name__) from e
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        if rates and self.cache is not None:
+            self.cache.put(date, rates)
+        return rates
+
+    async def fetch_many(self, dates):
+        results = await asyncio.gather(*(self.fetch(date) for date in dates), return_exceptions=True)
+        answer = []
+        for date, rates in zip(dates, results):
+            if isinstance(rates, (FetchError, aiohttp.ClientError, KeyError, ValueError)):
+                print(f"Error fetching data for date {date}: {rates}")
+                rates = []
+            elif isinstance(rates, BaseException):
+                raise rates
+            answer.append((date, rates))
+        return answer
+
+
+def dates_back(days):
+    if not 1 <= days <= MAX_DAYS:
+        raise ValueError(f'Number of days must be between 1 and {MAX_DAYS}')
+    today = datetime.now().date()
+    return [(today - timedelta(days=i)).strftime("%d.%m.%Y") for i in range(days)]
+
+
+def select_currencies(results, currencies):
+    return [
+        {
+            date: {
+                currency['currency']: {
+                    'sale': currency['saleRate'],
+                    'purchase': currency['purchaseRate']
+                } for currency in rates if currency['currency'] in currencies
+            }
+        }
+        for date, rates in results
+    ]
@@ -1,45 +1,13 @@
 import sys
-import aiohttp
 import asyncio
 import platform
-from datetime import datetime, timedelta
-
-
-async def fetch_data(date, session):
-    try:
-        async with session.get(f'https://api.privatbank.ua/p24api/exchange_rates?json&date={date}') as response:
-            json_data = await response.json()
-            return date, json_data['exchangeRate']
-    except Exception as e:
-        print(f"Error fetching data for date {date}: {e}")
-        return date, []
+from exchange import MAX_DAYS, RateCache, RateFetcher, dates_back, select_currencies
 
 
 async def main(currencies):
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_data(date, session) for date in dates_list]
-        results = await asyncio.gather(*tasks)
-        answer = []
-        for date, currency in results:
-            tmp = {
-                date: {
-                    currency['currency']: {
-                        'sale': currency['saleRate'],
-                        'purchase': currency['purchaseRate']
-                    } for currency in currency if currency['currency'] in currencies
-                }
-            }
-            answer.append(tmp)
-        return answer
-
-
-def generate_dates_list(days):
-    today = datetime.now().date()
-    dates_list = [today.strftime("%d.%m.%Y")]
-    for i in range(1, min(days, 10)):
-        previous_date = today - timedelta(days=i)
-        dates_list.append(previous_date.strftime("%d.%m.%Y"))
-    return dates_list
+    async with RateFetcher(cache=RateCache()) as fetcher:
+        results = await fetcher.fetch_many(dates_list)
+        return select_currencies(results, currencies)
 
 
 if __name__ == "__main__":
@@ -48,10 +16,10 @@ if __name__ == "__main__":
         sys.exit(1)
 
     days = int(sys.argv[1])
+    if not 1 <= days <= MAX_DAYS:
+        print(f"Number of days must be between 1 and {MAX_DAYS}")
+        sys.exit(1)
     currencies = sys.argv[2:]
 
-    if days <= 10:
-        dates_list = generate_dates_list(days)
-        asyncio.run(main(currencies))
-    else:
-        print('Max days: 10')
+    dates_list = dates_back(days)
+    asyncio.run(main(currencies))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# exchange.py and main.py are top-level modules of the project directory, not a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
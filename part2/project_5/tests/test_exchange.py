@@ -0,0 +1,110 @@
+import asyncio
+import importlib.util
+import pathlib
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+
+import exchange
+from exchange import MAX_DAYS, TODAY_TTL, RateCache, RateFetcher, dates_back
+
+PROJECT = pathlib.Path(__file__).resolve().parent.parent
+
+RATES = [{'currency': 'USD', 'saleRate': 41.5, 'purchaseRate': 41.0}]
+
+
+async def start_stand_in(answers, requests):
+    # answers the PrivatBank API with `answers[date]` (RATES by default) and records every requested date
+    async def exchange_rates(request):
+        date = request.query['date']
+        requests.append(date)
+        return web.json_response({'date': date, 'exchangeRate': answers.get(date, RATES)})
+
+    app = web.Application()
+    app.router.add_get('/p24api/exchange_rates', exchange_rates)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f'http://{host}:{port}/p24api/exchange_rates'
+
+
+def fetch(cache_path, dates, answers=None):
+    # one run of the CLI against the stand-in: returns the results and the dates requested upstream
+    async def main():
+        requests = []
+        runner, url = await start_stand_in(answers or {}, requests)
+        try:
+            async with RateFetcher(cache=RateCache(cache_path), url=url, retries=0) as fetcher:
+                results = await fetcher.fetch_many(dates)
+        finally:
+            await runner.cleanup()
+        return results, requests
+
+    return asyncio.run(main())
+
+
+def test_second_run_makes_no_requests(tmp_path):
+    dates = dates_back(5)
+    results, requests = fetch(tmp_path / 'rates.db', dates)
+    assert sorted(requests) == sorted(dates)
+    assert results == [(date, RATES) for date in dates]
+
+    results, requests = fetch(tmp_path / 'rates.db', dates)
+    assert requests == []
+    assert results == [(date, RATES) for date in dates]
+
+
+def test_today_is_refetched_after_ttl(tmp_path, monkeypatch):
+    today, yesterday = dates_back(2)
+    fetch(tmp_path / 'rates.db', [today, yesterday])
+
+    later = time.time() + TODAY_TTL + 1
+    monkeypatch.setattr(exchange, 'time', SimpleNamespace(time=lambda: later))
+    _, requests = fetch(tmp_path / 'rates.db', [today, yesterday])
+    assert requests == [today]
+
+
+def test_empty_answer_is_not_cached(tmp_path):
+    today, yesterday = dates_back(2)
+    answers = {yesterday: []}
+    results, _ = fetch(tmp_path / 'rates.db', [today, yesterday], answers)
+    assert results == [(today, RATES), (yesterday, [])]
+
+    results, requests = fetch(tmp_path / 'rates.db', [today, yesterday])
+    assert requests == [yesterday]
+    assert results == [(today, RATES), (yesterday, RATES)]
+
+
+def test_dates_back_is_bounded():
+    assert len(dates_back(MAX_DAYS)) == MAX_DAYS
+    for days in (0, MAX_DAYS + 1, 10 ** 9):
+        with pytest.raises(ValueError):
+            dates_back(days)
+
+
+def test_cli_rejects_too_many_days():
+    result = subprocess.run(
+        [sys.executable, 'main.py', str(MAX_DAYS + 1), 'USD'], cwd=PROJECT, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert f'between 1 and {MAX_DAYS}' in result.stdout
+
+
+def test_chat_rejects_too_many_days():
+    spec = importlib.util.spec_from_file_location('web_chat_main', PROJECT / 'web_chat' / 'main.py')
+    chat = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(chat)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    # the fetcher must not be touched: any upstream request would fail on None
+    server = chat.Server(fetcher=None)
+    asyncio.run(server.handle_exchange_command(SimpleNamespace(send=send), f'exchange {MAX_DAYS + 1}'))
+    assert sent == [f'Number of days must be between 1 and {MAX_DAYS}']
@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import base64
+import os
+import socket
+import time
+import websockets
+
+
+async def connect_all(url, count, batch=200):
+    clients = []
+    for start in range(0, count, batch):
+        clients += await asyncio.gather(
+            *(websockets.connect(url, ping_interval=None) for _ in range(min(batch, count - start)))
+        )
+    return clients
+
+
+async def receive(ws, latencies, expected, done):
+    received = 0
+    try:
+        async for message in ws:
+            _, _, payload = message.partition(': ')
+            if payload.startswith('load '):
+                latencies.append(time.perf_counter() - float(payload.split()[1]))
+                received += 1
+                if received == expected:
+                    break
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        done.append(received)
+
+
+async def run(url, clients, messages, rate, slow, size):
+    # slow clients never read and have a small receive window, so the server's
+    # buffers for them only grow
+    idle = await connect_all(url, slow)
+    for ws in idle:
+        ws.transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        ws.transport.pause_reading()
+    listeners = await connect_all(url, clients)
+    latencies = []
+    done = []
+    readers = [asyncio.create_task(receive(ws, latencies, messages, done)) for ws in listeners]
+    sender = listeners[0]
+    padding = base64.b64encode(os.urandom(size))[:size].decode()  # random, so compression does not shrink it
+    for _ in range(messages):
+        try:
+            await sender.send(f'load {time.perf_counter()} {padding}')
+        except websockets.ConnectionClosed:
+            break
+        await asyncio.sleep(1 / rate)
+    try:
+        await asyncio.wait_for(asyncio.gather(*readers), 30)
+    except asyncio.TimeoutError:
+        pass
+    for ws in listeners + idle:
+        ws.transport.abort()
+    return latencies, sum(done)
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Broadcast latency of the chat server with many connected clients')
+    parser.add_argument('--url', default='ws://localhost:8080')
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=20, help='messages per second')
+    parser.add_argument('--slow', type=int, default=0, help='extra clients that never read')
+    parser.add_argument('--size', type=int, default=0, help='padding added to every message, bytes')
+    args = parser.parse_args()
+
+    latencies, delivered = asyncio.run(
+        run(args.url, args.clients, args.messages, args.rate, args.slow, args.size)
+    )
+    latencies.sort()
+    delivered = f'{delivered}/{args.clients * args.messages}'
+    print(f'{"clients":>7} {"slow":>5} {"delivered":>14} {"p50, ms":>8} {"p99, ms":>8}')
+    print(
+        f'{args.clients:>7} {args.slow:>5} {delivered:>14} {percentile(latencies, 0.5) * 1000:>8.1f} '
+        f'{percentile(latencies, 0.99) * 1000:>8.1f}'
+    )
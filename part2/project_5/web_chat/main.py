@@ -1,18 +1,27 @@
+import sys
 import asyncio
 import logging
+import pathlib
 import websockets
 import names
 from websockets import WebSocketServerProtocol
-from websockets.exceptions import ConnectionClosedOK
-from datetime import datetime, timedelta
-import aiohttp
+from websockets.exceptions import ConnectionClosed
+from datetime import datetime
 from aiofile import AIOFile
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from exchange import MAX_DAYS, MemoryRateCache, RateFetcher, dates_back, select_currencies  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 
+SLOW_CLIENT_BUFFER = 1024 * 1024  # unsent bytes after which a client is disconnected as too slow
+
 class Server:
     clients = set()
 
+    def __init__(self, fetcher: RateFetcher):
+        self.fetcher = fetcher  # one aiohttp session for the lifetime of the server
+
     async def register(self, ws: WebSocketServerProtocol):
         ws.name = names.get_full_name()
         self.clients.add(ws)
@@ -23,14 +32,26 @@ class Server:
         logging.info(f'{ws.remote_address} disconnects')
 
     async def send_to_clients(self, message: str):
-        if self.clients:
-            [await client.send(message) for client in self.clients]
+        # broadcast writes to every socket buffer without waiting for any client;
+        # a client that lets its buffer grow past SLOW_CLIENT_BUFFER is dropped
+        receivers = []
+        for client in self.clients:
+            if client.transport.get_write_buffer_size() > SLOW_CLIENT_BUFFER:
+                self.drop(client)
+            else:
+                receivers.append(client)
+        websockets.broadcast(receivers, message)
+
+    def drop(self, ws: WebSocketServerProtocol):
+        # a close frame would queue behind the same full buffer, so the connection is cut
+        logging.info(f'{ws.remote_address} is too slow, disconnecting')
+        ws.transport.abort()
 
     async def ws_handler(self, ws: WebSocketServerProtocol):
         await self.register(ws)
         try:
             await self.distrubute(ws)
-        except ConnectionClosedOK:
+        except ConnectionClosed:
             pass
         finally:
             await self.unregister(ws)
@@ -46,11 +67,14 @@ class Server:
             await self.send_to_clients(f"{ws.name}: {message}")
 
     async def handle_exchange_command(self, ws: WebSocketServerProtocol, message: str):
+        if message.strip() == 'exchange stats':
+            await ws.send(str(self.fetcher.metrics()))
+            return
         try:
             command, days = message.split()
             days = int(days)
-            if days < 1:
-                await ws.send("Invalid number of days")
+            if not 1 <= days <= MAX_DAYS:
+                await ws.send(f"Number of days must be between 1 and {MAX_DAYS}")
                 return
         except ValueError:
             await ws.send("Invalid command format. Use 'exchange <days>'")
@@ -62,43 +86,19 @@ class Server:
 
         exchange_rates = await self.main(days)
         await ws.send(str(exchange_rates))
-
-    async def fetch_data(self, date, session):
-        try:
-            async with session.get(f'https://api.privatbank.ua/p24api/exchange_rates?json&date={date}') as response:
-                json_data = await response.json()
-                return date, json_data['exchangeRate']
-        except Exception as e:
-            print(f"Error fetching data for date {date}: {e}")
-            return date, []
+        logging.info(f'exchange cache: {self.fetcher.metrics()}')
 
     async def main(self, days: int):
         currencies = ['USD', 'EUR']
-        today = datetime.now().date()
-        dates_list = [today.strftime("%d.%m.%Y")]
-        for i in range(1, days):
-            previous_date = today - timedelta(days=i)
-            dates_list.append(previous_date.strftime("%d.%m.%Y"))
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.fetch_data(date, session) for date in dates_list]
-            results = await asyncio.gather(*tasks)
-            answer = []
-            for date, currency in results:
-                tmp = {
-                    date: {
-                        currency['currency']: {
-                            'sale': currency['saleRate'],
-                            'purchase': currency['purchaseRate']
-                        } for currency in currency if currency['currency'] in currencies
-                    }
-                }
-                answer.append(tmp)
-            return answer
+        results = await self.fetcher.fetch_many(dates_back(days))
+        return select_currencies(results, currencies)
 
 async def main():
-    server = Server()
-    async with websockets.serve(server.ws_handler, 'localhost', 8080):
-        await asyncio.Future()  # run forever
+    # shared by all clients: concurrent identical commands wait for the same downloads
+    async with RateFetcher(cache=MemoryRateCache()) as fetcher:
+        server = Server(fetcher)
+        async with websockets.serve(server.ws_handler, 'localhost', 8080):
+            await asyncio.Future()  # run forever
 
 if __name__ == '__main__':
     asyncio.run(main())